@@ -0,0 +1,226 @@
+"""
+Micro benchmarks of the data pipeline.
+Run all of them by `python3 benchmarks.py`, or only some of them by `python3 benchmarks.py csv_parser ...`.
+"""
+
+import inspect
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from timeit import repeat
+from typing import Final
+
+import parta
+from constants import DEFAULT_DATA_SOURCE_LOCATION
+from context import use_default_crypto_data_set
+from crossover_sweep import sweep_crossover_method
+from csv_reader import CryptoCompareCsvDto
+from enums import CsvParserMode, ValidationMode
+from model import CryptoRecord
+from range_index import max_between
+from utils import using_validation_mode
+from utils.colors import ConsoleColorWrapper, ConsoleColors
+from utils.timing import date_str_to_utc_number, utc_number_to_date_str, utc_numbers_to_date_strs
+
+# Every benchmark is repeated for this many times, and only the best one is reported.
+REPEAT_TIMES: Final[int] = 5
+
+
+def __best_seconds_of(func: Callable[[], object], number: int = 1) -> float:
+    return min(repeat(func, number=number, repeat=REPEAT_TIMES)) / number
+
+
+@contextmanager
+def __enlarged_csv_file(copies: int) -> Iterator[str]:
+    """
+    Write the default dataset `copies` times into a temporary csv file,
+    the time of every copy is shifted, so the rows are still sorted by the time.
+    """
+    with open(DEFAULT_DATA_SOURCE_LOCATION, mode='r', encoding='utf-8-sig') as file:
+        header, *lines = file.read().splitlines()
+
+    rows = [line.split(',', 1) for line in lines if line]
+    time_span = int(rows[-1][0]) - int(rows[0][0]) + 86400
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as file:
+        file.write(f"{header}\n")
+        for copy in range(copies):
+            file.writelines(f"{int(the_time) + copy * time_span},{rest}\n" for the_time, rest in rows)
+
+    try:
+        yield file.name
+    finally:
+        os.remove(file.name)
+
+
+def benchmark_csv_parser() -> None:
+    with __enlarged_csv_file(copies=50) as csv_file_path:
+        row_count = len(CryptoCompareCsvDto(csv_file_path).to_crypto_series())
+        print(f"parsing {row_count} rows:")
+
+        # The original path, which builds a `dict` and a `CryptoRecord` for each row.
+        seconds = __best_seconds_of(lambda: CryptoCompareCsvDto(csv_file_path).to_crypto_records())
+        print(f"  {'records':>12}: {row_count / seconds:12,.0f} rows/s")
+
+        for mode in CsvParserMode:
+            seconds = __best_seconds_of(lambda: CryptoCompareCsvDto(csv_file_path, mode).to_crypto_series())
+            print(f"  {mode.value:>12}: {row_count / seconds:12,.0f} rows/s")
+
+
+def benchmark_record_validation() -> None:
+    record_count = 100_000
+    values = (1430179200, 229.87, 222.03, 228.96, 225.81, 65971.19, 14896418.52)
+
+    def construct_records() -> None:
+        for _ in range(record_count):
+            CryptoRecord(*values)
+
+    print(f"constructing {record_count} records:")
+
+    for mode in ValidationMode:
+        with using_validation_mode(mode):
+            seconds = __best_seconds_of(construct_records)
+        print(f"  {mode.value:>12}: {seconds * 1e9 / record_count:8,.0f} ns/record")
+
+    with __enlarged_csv_file(copies=20) as csv_file_path:
+        row_count = len(CryptoCompareCsvDto(csv_file_path).to_crypto_series())
+        print(f"loading {row_count} rows by `to_crypto_records`:")
+
+        for mode in ValidationMode:
+            seconds = __best_seconds_of(
+                lambda: CryptoCompareCsvDto(csv_file_path, validation_mode=mode).to_crypto_records()
+            )
+            print(f"  {mode.value:>12}: {seconds * 1e3:8,.1f} ms")
+
+
+def benchmark_data_dispatch() -> None:
+    call_count = 10_000
+    data = use_default_crypto_data_set()
+
+    def find_caller_by_inspect_stack() -> str | None:
+        # How `expect_illegal_data_type` used to find the module of its caller.
+        caller_module = inspect.getmodule(inspect.stack()[1][0])
+        return caller_module.__name__ if caller_module is not None else None
+
+    def find_caller_by_frame() -> str | None:
+        return sys._getframe(1).f_globals.get('__name__')
+
+    print(f"finding the caller module, {call_count // 100} calls:")
+    for find_caller in (find_caller_by_inspect_stack, find_caller_by_frame):
+        seconds = __best_seconds_of(find_caller, number=call_count // 100)
+        print(f"  {find_caller.__name__:>28}: {seconds * 1e6:10,.2f} us/call")
+
+    print(f"calling `highest_price`, {call_count} calls:")
+    for name, given_data in (('with the dataset', data), ('falling back to default', None)):
+        seconds = __best_seconds_of(
+            lambda: parta.highest_price(given_data, '01/01/2016', '31/01/2016'),
+            number=call_count
+        )
+        print(f"  {name:>28}: {seconds * 1e6:10,.2f} us/call")
+
+
+def benchmark_range_extremum() -> None:
+    query_count = 10_000
+    data = use_default_crypto_data_set()
+    times = data.the_time.tolist()
+    ranges = [(times[i], times[min(i + 365, len(times) - 1)]) for i in range(0, len(times), 7)]
+
+    def scan_ranges() -> None:
+        for start_utc, end_utc in ranges:
+            max(data.between(start_utc, end_utc).high, default=0.0)
+
+    def query_ranges() -> None:
+        for start_utc, end_utc in ranges:
+            max_between(data, 'high', start_utc, end_utc)
+
+    print(f"max of `high` over {len(ranges)} ranges of a year:")
+    for name, query in (('scanning', scan_ranges), ('sparse table', query_ranges)):
+        seconds = __best_seconds_of(query, number=max(query_count // len(ranges), 1))
+        print(f"  {name:>28}: {seconds * 1e6 / len(ranges):10,.2f} us/query")
+
+
+def benchmark_date_conversion() -> None:
+    times = use_default_crypto_data_set().the_time.tolist()
+    date_strs = [datetime.fromtimestamp(the_time, tz=timezone.utc).strftime("%d/%m/%Y") for the_time in times]
+
+    def parse_by_strptime() -> None:
+        for date_str in date_strs:
+            int(datetime.strptime(date_str, "%d/%m/%Y").replace(tzinfo=timezone.utc).timestamp())
+
+    def parse_without_cache() -> None:
+        for date_str in date_strs:
+            date_str_to_utc_number.__wrapped__(date_str)
+
+    def parse_with_cache() -> None:
+        for date_str in date_strs:
+            date_str_to_utc_number(date_str)
+
+    print(f"parsing {len(date_strs)} dates:")
+    for name, parse in (
+            ('strptime', parse_by_strptime),
+            ('civil days', parse_without_cache),
+            ('civil days with cache', parse_with_cache),
+    ):
+        seconds = __best_seconds_of(parse)
+        print(f"  {name:>28}: {seconds * 1e9 / len(date_strs):10,.0f} ns/date")
+
+    def format_by_strftime() -> None:
+        for the_time in times:
+            datetime.fromtimestamp(the_time, tz=timezone.utc).strftime("%d/%m/%Y")
+
+    def format_without_cache() -> None:
+        for the_time in times:
+            utc_number_to_date_str.__wrapped__(the_time)
+
+    print(f"formatting {len(times)} dates:")
+    for name, format_dates in (
+            ('strftime', format_by_strftime),
+            ('civil days', format_without_cache),
+            ('civil days in batch', lambda: utc_numbers_to_date_strs(times)),
+    ):
+        seconds = __best_seconds_of(format_dates)
+        print(f"  {name:>28}: {seconds * 1e9 / len(times):10,.0f} ns/date")
+
+
+def benchmark_crossover_sweep() -> None:
+    data = use_default_crypto_data_set()
+    times = data.the_time.tolist()
+    date_ranges = [
+        (utc_number_to_date_str(times[i]), utc_number_to_date_str(times[min(i + 365, len(times) - 1)]))
+        for i in range(0, len(times), 30)
+    ]
+    window_pairs = [(short_scope, long_scope) for short_scope in range(2, 11) for long_scope in range(15, 60, 5)]
+
+    print(f"sweeping {len(window_pairs)} window pairs over {len(date_ranges)} ranges of a year, {os.cpu_count()} CPUs:")
+    for name, workers in (('in process', 1), ('process pool', None)):
+        seconds = __best_seconds_of(lambda: sweep_crossover_method(data, window_pairs, date_ranges, workers=workers))
+        print(f"  {name:>28}: {seconds * 1e6 / (len(window_pairs) * len(date_ranges)):10,.2f} us/pair")
+
+
+BENCHMARKS: Final[dict[str, Callable[[], None]]] = {
+    'csv_parser': benchmark_csv_parser,
+    'record_validation': benchmark_record_validation,
+    'data_dispatch': benchmark_data_dispatch,
+    'range_extremum': benchmark_range_extremum,
+    'date_conversion': benchmark_date_conversion,
+    'crossover_sweep': benchmark_crossover_sweep,
+}
+
+
+def main(names: list[str]) -> None:
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            with ConsoleColorWrapper(ConsoleColors.RED):
+                print(f"benchmark {name} not found. Only {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+
+        with ConsoleColorWrapper(ConsoleColors.CYAN):
+            print(f"-> {name}")
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
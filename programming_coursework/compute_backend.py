@@ -0,0 +1,67 @@
+from array import array
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import ModuleType
+from typing import Final
+
+from enums import ComputeBackend
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ["available_compute_backends", "numpy_or_none", "numpy_to_array", "using_compute_backend"]
+
+_compute_backend: Final[ContextVar[ComputeBackend]] = ContextVar('compute_backend', default=ComputeBackend.AUTO)
+
+
+def available_compute_backends() -> tuple[ComputeBackend, ...]:
+    """
+    The backends which can be selected explicitly in this environment.
+    """
+    if numpy is None:
+        return ComputeBackend.PYTHON,
+    return ComputeBackend.PYTHON, ComputeBackend.NUMPY
+
+
+@contextmanager
+def using_compute_backend(backend: ComputeBackend) -> Iterator[None]:
+    """
+    Select how the analytics of part A and C called within the context are computed.
+    Outside such a context, NumPy is used whenever it is installed.
+    Part D is out of the scope, its regressions are always computed in pure Python.
+
+    :param backend: the compute backend, see :class:`ComputeBackend`
+    :raise ModuleNotFoundError: if NumPy is selected but not installed
+    """
+    _backend: Final[ComputeBackend] = ComputeBackend(backend)
+
+    if _backend is ComputeBackend.NUMPY and numpy is None:
+        raise ModuleNotFoundError("the numpy compute backend requires numpy to be installed", name='numpy')
+
+    token = _compute_backend.set(_backend)
+    try:
+        yield
+    finally:
+        _compute_backend.reset(token)
+
+
+def numpy_or_none() -> ModuleType | None:
+    """
+    The NumPy module when the selected backend computes by NumPy, otherwise `None`,
+    in which case the caller falls back to its pure Python path.
+    """
+    if _compute_backend.get() is ComputeBackend.PYTHON:
+        return None
+    return numpy
+
+
+def numpy_to_array(values: 'numpy.ndarray') -> array:
+    """
+    Copy a 1-d float64 ndarray into an `array`, so the results are plain Python floats again.
+    """
+    result = array('d')
+    result.frombytes(numpy.ascontiguousarray(values, dtype=numpy.float64).tobytes())
+    return result
@@ -1,58 +1,292 @@
-import inspect
-from collections.abc import Callable
+import os
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
 from typing import TypeVar, Final, Any
 
 from constants import DEFAULT_DATA_SOURCE_LOCATION
+from csv_cache import load_crypto_series_with_cache
 from csv_reader import CryptoCompareCsvDto
-from model import CryptoRecord
+from enums import DuplicateTimePolicy
+from series import CryptoSeries, as_crypto_series
+from utils import JsonSerializable
 
 # TODO: migrate to 3.12 generic feature.
 _R = TypeVar('_R', covariant=True)
 
+# The modules whose calls get the given data back even if it's not usable, see `resolve_crypto_series`.
+# `crossover_sweep` passes the dataset it has resolved already to the functions of part C.
 FRIEND_CONTEXT_MODULE_NAMES: Final[frozenset[str]] = frozenset({
+    'crossover_sweep',
     'parta',
     'partb',
     'partc',
     'partd',
 })
 
+# The default upper bound of the total size of the datasets kept by the registry, in bytes.
+DEFAULT_REGISTRY_MEMORY_BUDGET: Final[int] = 512 * 1024 * 1024
+
+
+def resolve_crypto_series(given_data: Any, owner_module_name: str) -> Any:
+    """
+    Resolve the data given to a function taking a dataset, e.g. the functions decorated by
+    :func:`expect_illegal_data_type`. It must be called by that function directly.
+
+    A usable dataset (a non-empty :class:`CryptoSeries`, or a sequence of :class:`CryptoRecord`) is converted
+    into a :class:`CryptoSeries`. Otherwise, the default dataset is used instead, unless the function is called
+    by its own module or a friend context module, which gets the given data back to see how it is handled.
+
+    Args:
+        given_data: the data given to the function
+        owner_module_name: the name of the module of the function
+
+    Returns:
+        the dataset to be used by the function
+    """
+    # A tuple of `CryptoRecord` is also accepted, it will be converted into a `CryptoSeries`.
+    given_series = as_crypto_series(given_data)
+
+    if given_series is not None and len(given_series) > 0:
+        return given_series
+
+    # This operation can not be extracted to a function, because the caller_module_name
+    # is the module name of the caller of the function calling this one.
+    # Only the frame of the caller is touched, instead of collecting every frame with its source context.
+    caller_module_name = sys._getframe(2).f_globals.get('__name__')
+
+    if owner_module_name != caller_module_name:
+        if caller_module_name not in FRIEND_CONTEXT_MODULE_NAMES:
+            return use_default_crypto_data_set()
+
+    return given_series if given_series is not None else given_data
+
 
 def expect_illegal_data_type(
-        func: Callable[[tuple[CryptoRecord], str, str], _R]
+        func: Callable[[CryptoSeries, str, str], _R]
 ) -> Callable[[Any, str, str], _R]:
     def __get_original_module_name() -> str:
         # noinspection PyUnresolvedReferences
         return func.__module__
 
     def __context_applied_func(given_data: Any, start_date: str, end_date: str) -> _R:
-        if (
-                isinstance(given_data, tuple)
-                and len(given_data) > 0
-                and isinstance(given_data[0], CryptoRecord)
-        ):
-            return func(given_data, start_date, end_date)
+        return func(resolve_crypto_series(given_data, __get_original_module_name()), start_date, end_date)
 
-        original_module_name = __get_original_module_name()
+    return __context_applied_func
 
-        # This operation can not be extracted to a function, because the caller_module_name
-        # is the module name of the caller of the caller of this function.
-        caller_module = inspect.getmodule(inspect.stack()[1][0])
-        caller_module_name = caller_module.__name__ if caller_module is not None else None
 
-        if original_module_name != caller_module_name:
-            if caller_module_name not in FRIEND_CONTEXT_MODULE_NAMES:
-                data = use_default_crypto_data_set()
-                return func(data, start_date, end_date)
+@dataclass(frozen=True)
+class DataSetRegistryStats(JsonSerializable):
+    """
+    A snapshot of the counters of a :class:`CryptoDataSetRegistry`.
 
-        return func(given_data, start_date, end_date)
+    Attributes:
+        hits: the number of lookups served by a registered dataset
+        misses: the number of lookups which had to read the dataset
+        evictions: the number of datasets dropped to stay within the memory budget
+        data_set_count: the number of datasets currently registered
+        nbytes: the total size of the datasets currently registered
+        memory_budget: the upper bound of `nbytes`
+    """
 
-    return __context_applied_func
+    hits: int
+    misses: int
+    evictions: int
+    data_set_count: int
+    nbytes: int
+    memory_budget: int
+
+
+class CryptoDataSetRegistry:
+    """
+    A process-wide registry of the loaded datasets, so a dataset is read only once and shared by every caller.
+
+    The datasets are keyed by the absolute path, the modification time and the size of the csv file,
+    so a changed file is read again. When the total size of the datasets exceeds the memory budget,
+    the least recently used ones are evicted. The registered datasets are frozen, as they are shared.
+    """
+
+    __entries: Final[OrderedDict[tuple[str, int, int], CryptoSeries]]
+    __lock: Final[Lock]
+    __memory_budget: int
+    __nbytes: int
+    __hits: int
+    __misses: int
+    __evictions: int
+
+    def __init__(self, memory_budget: int = DEFAULT_REGISTRY_MEMORY_BUDGET) -> None:
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+        self.__memory_budget = memory_budget
+        self.__nbytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @property
+    def memory_budget(self) -> int:
+        return self.__memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, memory_budget: int) -> None:
+        with self.__lock:
+            self.__memory_budget = memory_budget
+            self.__evict_over_budget()
+
+    @property
+    def stats(self) -> DataSetRegistryStats:
+        with self.__lock:
+            return DataSetRegistryStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                data_set_count=len(self.__entries),
+                nbytes=self.__nbytes,
+                memory_budget=self.__memory_budget,
+            )
+
+    def __remove(self, key: tuple[str, int, int]) -> None:
+        self.__nbytes -= self.__entries.pop(key).nbytes
+
+    def __evict_over_budget(self, keep: tuple[str, int, int] | None = None) -> None:
+        # The least recently used ones are at the beginning.
+        for key in tuple(self.__entries):
+            if self.__nbytes <= self.__memory_budget:
+                break
+            if key != keep:
+                self.__remove(key)
+                self.__evictions += 1
+
+    def get(self, data_source_location: str, loader: Callable[[str], CryptoSeries]) -> CryptoSeries:
+        """
+        Get the registered dataset of the given csv file, or read it by the loader and register it.
+
+        Args:
+            data_source_location: the path of the csv file
+            loader: reads the dataset from the path, when it is not registered yet
+
+        Returns:
+            the shared, frozen dataset
+        """
+        try:
+            csv_stat = os.stat(data_source_location)
+        except OSError:
+            # Let the loader raise the error in the same way as the dataset is read without the registry.
+            return loader(data_source_location)
 
+        path = os.path.abspath(data_source_location)
+        key = (path, csv_stat.st_mtime_ns, csv_stat.st_size)
 
-def use_crypto_data_set_from(data_source_location: str) -> tuple[CryptoRecord]:
-    dto = CryptoCompareCsvDto(data_source_location)
-    return dto.to_crypto_records()
+        with self.__lock:
+            if (series := self.__entries.get(key)) is not None:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return series
 
+            self.__misses += 1
 
-def use_default_crypto_data_set() -> tuple[CryptoRecord]:
+        # Do not hold the lock while reading, other datasets can still be served meanwhile.
+        series = loader(data_source_location)
+        series.freeze()
+
+        with self.__lock:
+            # Drop the outdated versions of the same file.
+            for outdated_key in [each_key for each_key in self.__entries if each_key[0] == path]:
+                self.__remove(outdated_key)
+
+            self.__entries[key] = series
+            self.__nbytes += series.nbytes
+            self.__evict_over_budget(keep=key)
+
+        return series
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__nbytes = 0
+
+
+__data_set_registry: Final[CryptoDataSetRegistry] = CryptoDataSetRegistry()
+
+
+def use_crypto_data_set_registry() -> CryptoDataSetRegistry:
+    """
+    The process-wide registry used by :func:`use_crypto_data_set_from`.
+    """
+    return __data_set_registry
+
+
+def use_crypto_data_set_from(data_source_location: str, use_cache: bool = True) -> CryptoSeries:
+    """
+    Read the dataset from the given csv file.
+    The dataset is shared by all the callers through :func:`use_crypto_data_set_registry`,
+    so it is read only once until the csv file is changed.
+
+    Args:
+        data_source_location: the path of the csv file
+        use_cache: whether to load the dataset from (and keep) a binary cache next to the csv file
+
+    Returns:
+        the shared, frozen dataset
+    """
+    if use_cache:
+        return __data_set_registry.get(data_source_location, load_crypto_series_with_cache)
+
+    return __data_set_registry.get(
+        data_source_location,
+        lambda location: CryptoCompareCsvDto(location).to_crypto_series()
+    )
+
+
+def use_default_crypto_data_set() -> CryptoSeries:
     return use_crypto_data_set_from(DEFAULT_DATA_SOURCE_LOCATION)
+
+
+def __read_packed_columns_from(data_source_location: str, use_cache: bool) -> tuple[int, bytes]:
+    # Runs in the worker processes. The packed columns are much cheaper to pickle than a tuple of records.
+    series = use_crypto_data_set_from(data_source_location, use_cache)
+    return len(series), series.to_bytes()
+
+
+def use_crypto_data_set_from_many(
+        data_source_locations: Iterable[str],
+        workers: int | None = None,
+        use_cache: bool = True,
+        duplicate_time_policy: DuplicateTimePolicy = DuplicateTimePolicy.KEEP,
+) -> CryptoSeries:
+    """
+    Read the dataset split into many csv files (e.g. one file per month), and merge them into one dataset.
+    The files are parsed in parallel by a pool of processes.
+
+    Args:
+        data_source_locations: the paths of the csv files
+        workers: the maximal number of processes, defaults to the number of CPUs.
+            The files are read in the current process when it is 1 or there's only one file.
+        use_cache: whether to load each file from (and keep) a binary cache next to it
+        duplicate_time_policy: how to handle the records sharing the same time, within or across the files
+
+    Returns:
+        the merged dataset, sorted by the time
+    """
+    _data_source_locations: Final[tuple[str, ...]] = tuple(data_source_locations)
+
+    if workers == 1 or len(_data_source_locations) <= 1:
+        return CryptoSeries.merge(
+            (use_crypto_data_set_from(location, use_cache) for location in _data_source_locations),
+            duplicate_time_policy
+        )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        packed_results = executor.map(
+            __read_packed_columns_from,
+            _data_source_locations,
+            (use_cache,) * len(_data_source_locations)
+        )
+
+        return CryptoSeries.merge(
+            (CryptoSeries.from_buffer(packed, length) for length, packed in packed_results),
+            duplicate_time_policy
+        )
@@ -0,0 +1,213 @@
+import os
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple
+from itertools import pairwise, repeat
+from typing import Any, Final
+
+from compute_backend import numpy_or_none
+from context import resolve_crypto_series
+from model import CrossoverSweepResult
+from partc import moving_averages
+from series import CryptoSeries
+from shared_series import attach_crypto_series, publish_crypto_series
+from tester import use_validated_date
+from utils import utc_numbers_to_date_strs
+
+__all__ = ["sweep_crossover_method"]
+
+# Each worker process is given about this many tasks, so the slow date ranges are balanced among the workers.
+TASKS_PER_WORKER: Final[int] = 4
+
+# The dataset attached by a worker process, see `__attach_shared_data_set`.
+_worker_data_set: CryptoSeries | None = None
+
+
+def __crossover_positions(
+        short_averages: Sequence[float],
+        long_averages: Sequence[float],
+) -> tuple[list[int], list[int]]:
+    """
+    The same decisions as :func:`partc.find_buy_list` and :func:`partc.find_sell_list`,
+    but made on the aligned arrays of the moving averages instead of the dictionaries.
+
+    Returns:
+        the positions that we should buy, and the positions that we should sell
+    """
+    if (np := numpy_or_none()) is not None:
+        short_array = np.asarray(short_averages, dtype=np.float64)
+        long_array = np.asarray(long_averages, dtype=np.float64)
+        was_below = short_array[:-1] < long_array[:-1]
+        is_below = short_array[1:] < long_array[1:]
+        return (
+            (np.flatnonzero(was_below & ~is_below) + 1).tolist(),
+            (np.flatnonzero(~was_below & is_below) + 1).tolist(),
+        )
+
+    buy_positions: list[int] = []
+    sell_positions: list[int] = []
+
+    for position, ((short_value_t_1, long_value_t_1), (short_value_t, long_value_t)) in enumerate(
+            pairwise(zip(short_averages, long_averages)),
+            start=1
+    ):
+        if short_value_t_1 < long_value_t_1 and short_value_t >= long_value_t:
+            buy_positions.append(position)
+        elif short_value_t_1 >= long_value_t_1 and short_value_t < long_value_t:
+            sell_positions.append(position)
+
+    return buy_positions, sell_positions
+
+
+def __simulate_return(
+        close_amounts: Sequence[float],
+        buy_positions: list[int],
+        sell_positions: list[int],
+) -> tuple[int, float]:
+    """
+    Follow the signals with a single position: buy when not holding, sell when holding.
+
+    Returns:
+        the number of times of buying, and the relative gain
+    """
+    signals = sorted(
+        [(position, True) for position in buy_positions] + [(position, False) for position in sell_positions]
+    )
+
+    trade_count = 0
+    value = 1.0
+    entry_price: float | None = None
+
+    for position, is_buy in signals:
+        if is_buy and entry_price is None and close_amounts[position] > 0:
+            entry_price = close_amounts[position]
+            trade_count += 1
+        elif not is_buy and entry_price is not None:
+            value *= close_amounts[position] / entry_price
+            entry_price = None
+
+    if entry_price is not None:
+        value *= close_amounts[-1] / entry_price
+
+    return trade_count, value - 1
+
+
+def __evaluate_date_range(
+        series: CryptoSeries,
+        date_range: tuple[str, str],
+        window_pairs: tuple[tuple[int, int], ...],
+) -> list[CrossoverSweepResult]:
+    start_date, end_date = date_range
+
+    # All the window sizes of the range are computed together.
+    scopes = {scope for window_pair in window_pairs for scope in window_pair}
+    table = moving_averages(series, start_date, end_date, scopes)
+    close_amounts = series.between(*use_validated_date(start_date, end_date)).close_amount
+    date_strs = utc_numbers_to_date_strs(table.the_time)
+
+    results: list[CrossoverSweepResult] = []
+
+    for short_scope, long_scope in window_pairs:
+        buy_positions, sell_positions = __crossover_positions(table.averages[short_scope], table.averages[long_scope])
+        trade_count, simulated_return = __simulate_return(close_amounts, buy_positions, sell_positions)
+
+        results.append(CrossoverSweepResult(
+            short_scope=short_scope,
+            long_scope=long_scope,
+            start_date=start_date,
+            end_date=end_date,
+            buy_list=tuple(date_strs[position] for position in buy_positions),
+            sell_list=tuple(date_strs[position] for position in sell_positions),
+            trade_count=trade_count,
+            simulated_return=simulated_return,
+        ))
+
+    return results
+
+
+def __attach_shared_data_set(shared_name: str) -> None:
+    # Runs once in each worker process, the dataset is attached without being copied or pickled.
+    global _worker_data_set
+    _worker_data_set = attach_crypto_series(shared_name)
+
+
+def __evaluate_date_ranges_in_worker(
+        date_ranges: tuple[tuple[str, str], ...],
+        window_pairs: tuple[tuple[int, int], ...],
+) -> list[tuple]:
+    # The results are sent back as plain tuples, since a `JsonSerializable` can not be unpickled.
+    return [
+        astuple(result)
+        for date_range in date_ranges
+        for result in __evaluate_date_range(_worker_data_set, date_range, window_pairs)
+    ]
+
+
+def sweep_crossover_method(
+        data_: Any,
+        window_pairs: Iterable[tuple[int, int]],
+        date_ranges: Iterable[tuple[str, str]],
+        workers: int | None = None,
+        top: int | None = None,
+) -> list[CrossoverSweepResult]:
+    """
+    Evaluate :func:`partc.crossover_method` with every pair of window sizes over every date range,
+    and rank the outcomes by the return of following the signals.
+
+    The date ranges are distributed over a pool of processes. The dataset is published to shared memory once,
+    and every worker attaches to it, instead of pickling the dataset for each task.
+
+    Args:
+        data_: the data from a data_source file, resolved by :func:`context.resolve_crypto_series`
+        window_pairs: pairs of the window sizes of the short and the long moving averages, e.g. (3, 10)
+        date_ranges: pairs of a start date and an end date, both are strings in "dd/mm/yyyy" format
+        workers: the maximal number of processes, defaults to the number of CPUs.
+            Everything is evaluated in the current process when it is 1 or there's only one date range.
+        top: only keep this many best results, all of them are kept when it is not given
+
+    Returns:
+        the results, from the highest simulated return to the lowest
+
+    Raises:
+        ValueError: if any window size or date is invalid
+        StartDateAfterEndDateError: if the start date of any range is after its end date
+    """
+    _window_pairs: Final[tuple[tuple[int, int], ...]] = tuple(dict.fromkeys(window_pairs))
+    _date_ranges: Final[tuple[tuple[str, str], ...]] = tuple(dict.fromkeys(date_ranges))
+
+    if any(scope <= 0 for window_pair in _window_pairs for scope in window_pair):
+        raise ValueError('scope should greater than 0')
+
+    # Fail fast in the current process, rather than in a worker after the other ranges are evaluated.
+    for date_range in _date_ranges:
+        use_validated_date(*date_range)
+
+    series = resolve_crypto_series(data_, __name__)
+
+    if workers == 1 or len(_date_ranges) <= 1:
+        results = [
+            result
+            for date_range in _date_ranges
+            for result in __evaluate_date_range(series, date_range, _window_pairs)
+        ]
+    else:
+        _workers: Final[int] = workers if workers is not None else os.cpu_count() or 1
+        task_size = max(len(_date_ranges) // (_workers * TASKS_PER_WORKER), 1)
+        tasks = [_date_ranges[index:index + task_size] for index in range(0, len(_date_ranges), task_size)]
+
+        with publish_crypto_series(series) as shared_series:
+            with ProcessPoolExecutor(
+                    max_workers=_workers,
+                    initializer=__attach_shared_data_set,
+                    initargs=(shared_series.name,)
+            ) as executor:
+                results = [
+                    CrossoverSweepResult(*result_fields)
+                    for task_results in executor.map(__evaluate_date_ranges_in_worker, tasks, repeat(_window_pairs))
+                    for result_fields in task_results
+                ]
+
+    # `sorted` is stable, so the results with the same return keep the order of the given pairs and ranges.
+    ranked_results = sorted(results, key=lambda result: result.simulated_return, reverse=True)
+
+    return ranked_results if top is None else ranked_results[:top]
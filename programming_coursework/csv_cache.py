@@ -0,0 +1,123 @@
+import mmap
+import os
+import struct
+import zlib
+from typing import Final
+
+from csv_reader import CryptoCompareCsvDto
+from series import CryptoSeries
+
+__all__ = ["CACHE_FILE_SUFFIX", "cache_file_path_of", "load_crypto_series_with_cache"]
+
+CACHE_FILE_SUFFIX: Final[str] = '.btccache'
+
+# Bump this whenever the layout of the cache file is changed, so the old cache files will be rebuilt.
+_CACHE_FORMAT_VERSION: Final[int] = 2
+_CACHE_MAGIC: Final[bytes] = b'BTCCACHE'
+
+# The metadata in the header of the packed columns: crc32 of the csv path, csv size, csv mtime in ns.
+_METADATA: Final[struct.Struct] = struct.Struct('<Iqq')
+
+
+def cache_file_path_of(csv_file_path: str) -> str:
+    """
+    The sidecar cache file is placed next to the csv file, e.g. `data.csv` -> `data.btccache`.
+    """
+    return f"{os.path.splitext(csv_file_path)[0]}{CACHE_FILE_SUFFIX}"
+
+
+def __metadata_of(csv_file_path: str, csv_stat: os.stat_result) -> bytes:
+    return _METADATA.pack(
+        zlib.crc32(os.path.abspath(csv_file_path).encode('utf-8')),
+        csv_stat.st_size,
+        csv_stat.st_mtime_ns,
+    )
+
+
+def __load_from_cache_file(cache_file_path: str, csv_file_path: str, csv_stat: os.stat_result) -> CryptoSeries | None:
+    """
+    Memory-map the cache file and build a series on top of it.
+
+    Returns:
+        the cached series, or `None` when the cache file is missing, broken or outdated
+    """
+    try:
+        with open(cache_file_path, mode='rb') as file:
+            # The mapping is kept alive by the memoryviews of the series, even after the file is closed.
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # `ValueError` is raised by mmap when the file is empty.
+        return None
+
+    try:
+        series, metadata = CryptoSeries.from_packed_with_header(mapped, _CACHE_MAGIC, _CACHE_FORMAT_VERSION)
+    except ValueError:
+        return None
+
+    if (
+            metadata[:_METADATA.size] != __metadata_of(csv_file_path, csv_stat)
+            or len(mapped) != CryptoSeries.packed_with_header_size(len(series))
+    ):
+        return None
+
+    return series
+
+
+def __write_cache_file(
+        cache_file_path: str,
+        csv_file_path: str,
+        csv_stat: os.stat_result,
+        series: CryptoSeries,
+) -> None:
+    # Write to a temporary file first, so other processes will never read a partially written cache.
+    temp_file_path = f"{cache_file_path}.{os.getpid()}.tmp"
+
+    try:
+        with open(temp_file_path, mode='wb') as file:
+            file.writelines(series.packed_with_header(
+                _CACHE_MAGIC,
+                _CACHE_FORMAT_VERSION,
+                __metadata_of(csv_file_path, csv_stat)
+            ))
+
+        os.replace(temp_file_path, cache_file_path)
+    except OSError:
+        # The cache is only an optimization, e.g. the data source directory may be read-only.
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+def load_crypto_series_with_cache(csv_file_path: str, cache_file_path: str | None = None) -> CryptoSeries:
+    """
+    Load the dataset from a binary sidecar cache of the csv file, and (re)build the cache when
+    it is missing or the csv file has been changed since the cache was written.
+    The cache is keyed by the path, the size and the modification time of the csv file.
+
+    Args:
+        csv_file_path: the path of the csv file
+        cache_file_path: where the cache is stored, defaults to :func:`cache_file_path_of` the csv file
+
+    Returns:
+        the dataset, backed by a read-only memory mapping of the cache file when possible
+    """
+    _cache_file_path: Final[str] = cache_file_path if cache_file_path is not None else cache_file_path_of(
+        csv_file_path
+    )
+
+    dto = CryptoCompareCsvDto(csv_file_path)
+
+    try:
+        csv_stat = os.stat(csv_file_path)
+    except OSError:
+        # Let the dto raise the error in the same way as the dataset is read without a cache.
+        return dto.to_crypto_series()
+
+    if (cached_series := __load_from_cache_file(_cache_file_path, csv_file_path, csv_stat)) is not None:
+        return cached_series
+
+    series = dto.to_crypto_series()
+    __write_cache_file(_cache_file_path, csv_file_path, csv_stat, series)
+
+    return series
@@ -1,16 +1,39 @@
-from csv import DictReader
+import os
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from csv import DictReader, reader as csv_reader
+from io import TextIOWrapper
+from itertools import islice, pairwise
+from operator import itemgetter
 from platform import python_version
-from typing import Final
+from typing import BinaryIO, Final
 
-from model import CryptoRecord
+from enums import CsvIssueKind, CsvParserMode, DuplicateTimePolicy, ValidationMode
+from model import CryptoRecord, CsvIssue, CsvValidationReport
+from series import CryptoSeries, TIME_TYPECODE, VALUE_TYPECODE, positions_of_unique_times
+from utils import SECONDS_PER_DAY, using_validation_mode
 
 CSV = tuple[dict[str, str], ...]
 
-__all__ = ["CryptoCompareCsvDto"]
+# The default number of rows parsed at a time by the streaming APIs.
+DEFAULT_CHUNK_SIZE: Final[int] = 64 * 1024
+
+# The default number of the detailed problems of each kind kept by a validation report.
+DEFAULT_MAX_ISSUES_PER_KIND: Final[int] = 100
+
+# The number of bytes right before the offset of a tail, which are compared to tell whether the file is only appended.
+TAIL_CHECK_SIZE: Final[int] = 256
+
+__all__ = ["CryptoCompareCsvDto", "CryptoCompareCsvTail", "merge_csv_files"]
 
 
 class CryptoCompareCsvDto:
     __csv_file_path: Final[str]
+    __parser_mode: Final[CsvParserMode]
+    __duplicate_time_policy: Final[DuplicateTimePolicy]
+    __validation_mode: Final[ValidationMode]
 
     TIME_COL_NAME: Final[str] = 'time'
     HIGH_COL_NAME: Final[str] = 'high'
@@ -20,24 +43,145 @@ class CryptoCompareCsvDto:
     VOLUME_FROM_COL_NAME: Final[str] = 'volumefrom'
     VOLUME_TO_COL_NAME: Final[str] = 'volumeto'
 
-    def __init__(self, csv_file_path: str) -> None:
+    def __init__(
+            self,
+            csv_file_path: str,
+            parser_mode: CsvParserMode = CsvParserMode.POSITIONAL,
+            duplicate_time_policy: DuplicateTimePolicy = DuplicateTimePolicy.KEEP,
+            validation_mode: ValidationMode = ValidationMode.FULL,
+    ) -> None:
+        """
+        Args:
+            csv_file_path: the path of the csv file
+            parser_mode: how the csv file is parsed, see :class:`CsvParserMode`.
+                Rows given by `raw_csv` are always `dict`, and are not affected by this.
+            duplicate_time_policy: how to handle the records sharing the same time, see :class:`DuplicateTimePolicy`
+            validation_mode: how the records built by :meth:`to_crypto_records` are validated,
+                see :class:`ValidationMode`
+        """
         self.__csv_file_path = csv_file_path
+        self.__parser_mode = CsvParserMode(parser_mode)
+        self.__duplicate_time_policy = DuplicateTimePolicy(duplicate_time_policy)
+        self.__validation_mode = ValidationMode(validation_mode)
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        """
+        The names of the csv columns, in the order of :attr:`CryptoSeries.COLUMN_NAMES`.
+        """
+        return (
+            self.TIME_COL_NAME,
+            self.HIGH_COL_NAME,
+            self.LOW_COL_NAME,
+            self.OPEN_COL_NAME,
+            self.CLOSE_COL_NAME,
+            self.VOLUME_FROM_COL_NAME,
+            self.VOLUME_TO_COL_NAME,
+        )
 
-    def __read_csv_rows(self) -> CSV:
+    @contextmanager
+    def __open_csv_file(self) -> Iterator[TextIOWrapper]:
         try:
-            with open(self.__csv_file_path, mode='r', newline='', encoding='utf-8-sig') as file:
-                if python_version() >= '3.12':
-                    # FIXME: Remove this when python 3.12 is well-known and widely used.
-                    reader = DictReader[dict[str, str]](file)
-                else:
-                    reader = DictReader(file)
-                return tuple([r for r in reader])
+            file = open(self.__csv_file_path, mode='r', newline='', encoding='utf-8-sig')
         except FileNotFoundError as e:
             raise FileNotFoundError(
                 'Error: the dataset is not found.'
                 'Please check if the dataset is in the correct location.'
             ) from e
 
+        with file:
+            yield file
+
+    def __iter_csv_rows(self) -> Iterator[dict[str, str]]:
+        """
+        Lazily read the rows of the csv file one by one, so the whole file is never held in memory.
+        """
+        with self.__open_csv_file() as file:
+            if python_version() >= '3.12':
+                # FIXME: Remove this when python 3.12 is well-known and widely used.
+                reader = DictReader[dict[str, str]](file)
+            else:
+                reader = DictReader(file)
+            yield from reader
+
+    def __iter_positional_chunks(self, chunk_size: int) -> Iterator[CryptoSeries]:
+        """
+        The fast path of parsing the csv file.
+        The header is resolved to the positions of the columns only once,
+        then every chunk of rows is converted column by column instead of row by row.
+        """
+        with self.__open_csv_file() as file:
+            reader = csv_reader(file)
+
+            if (header := next(reader, None)) is None:
+                return
+
+            column_getters = self.__column_getters_of(header)
+
+            # Skip the blank lines, which is the same as `DictReader`.
+            rows = filter(None, reader)
+
+            while chunk := list(islice(rows, chunk_size)):
+                yield self.__from_positional_rows_to_crypto_series(chunk, column_getters)
+
+    def __column_getters_of(self, header: list[str]) -> tuple[itemgetter | None, ...]:
+        # The last one wins when there are duplicated names, which is the same as `DictReader`.
+        positions = {name: position for position, name in enumerate(header)}
+        return tuple(
+            itemgetter(positions[name]) if name in positions else None
+            for name in self.column_names
+        )
+
+    def positional_rows_to_crypto_series(self, header: list[str], rows: list[list[str]]) -> CryptoSeries:
+        """
+        Convert the rows split by `csv.reader` into a :class:`CryptoSeries`, column by column.
+        The rows are kept in the given order.
+
+        Args:
+            header: the first row of the csv file
+            rows: the data rows of the csv file, without blank lines
+
+        Raises:
+            KeyError: if some required columns are missing and there is any row
+        """
+        return self.__from_positional_rows_to_crypto_series(rows, self.__column_getters_of(header))
+
+    def __from_positional_rows_to_crypto_series(
+            self,
+            rows: list[list[str]],
+            column_getters: tuple[itemgetter | None, ...],
+    ) -> CryptoSeries:
+        if len(rows) > 0 and None in column_getters:
+            raise KeyError(
+                'Error: missing column in the dataset.'
+                'Please check if the dataset is valid.'
+            )
+
+        time_getter, *value_getters = column_getters
+
+        try:
+            return CryptoSeries(
+                array(TIME_TYPECODE, map(int, map(time_getter, rows))),
+                *(array(VALUE_TYPECODE, map(float, map(getter, rows))) for getter in value_getters)
+            )
+        except IndexError as e:
+            raise ValueError(
+                'Error: some rows have fewer columns than the header.'
+                'Please check if the dataset is valid.'
+            ) from e
+
+    def __iter_dict_chunks(self, chunk_size: int) -> Iterator[CryptoSeries]:
+        rows = self.__iter_csv_rows()
+
+        while len(chunk := self.__from_rows_to_crypto_series(islice(rows, chunk_size))) > 0:
+            yield chunk
+
+    def __iter_file_chunks(self, chunk_size: int) -> Iterator[CryptoSeries]:
+        if self.__parser_mode is CsvParserMode.POSITIONAL:
+            return self.__iter_positional_chunks(chunk_size)
+
+        return self.__iter_dict_chunks(chunk_size)
+
     def __from_row_to_crypto_compare_record(self, row: dict[str, ...]) -> CryptoRecord:
         try:
             return CryptoRecord(
@@ -55,15 +199,417 @@ class CryptoCompareCsvDto:
                 'Please check if the dataset is valid.'
             ) from e
 
+    def __from_rows_to_crypto_series(self, rows: Iterable[dict[str, ...]]) -> CryptoSeries:
+        """
+        Write the rows into the columns of a :class:`CryptoSeries` directly,
+        without creating a :class:`CryptoRecord` for each row. The rows are kept in the given order.
+        """
+        the_time = array(TIME_TYPECODE)
+        high, low, open_amount, close_amount, volume_from, volume_to = (array(VALUE_TYPECODE) for _ in range(6))
+
+        try:
+            for row in rows:
+                the_time.append(int(row[self.TIME_COL_NAME]))
+                high.append(float(row[self.HIGH_COL_NAME]))
+                low.append(float(row[self.LOW_COL_NAME]))
+                open_amount.append(float(row[self.OPEN_COL_NAME]))
+                close_amount.append(float(row[self.CLOSE_COL_NAME]))
+                volume_from.append(float(row[self.VOLUME_FROM_COL_NAME]))
+                volume_to.append(float(row[self.VOLUME_TO_COL_NAME]))
+        except KeyError as e:
+            raise KeyError(
+                'Error: missing column in the dataset.'
+                'Please check if the dataset is valid.'
+            ) from e
+
+        return CryptoSeries(the_time, high, low, open_amount, close_amount, volume_from, volume_to)
+
+    def validation_report(
+            self,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            max_issues_per_kind: int = DEFAULT_MAX_ISSUES_PER_KIND,
+    ) -> CsvValidationReport:
+        """
+        Scan the csv file once and collect all the problems in it, instead of failing at the first one,
+        so a bad export can be cleaned in one go.
+
+        The rows are checked chunk by chunk and each column is converted at once,
+        so the memory usage is bounded by the chunk size and the number of kept problems,
+        however large the file is. For the same reason, a duplicated time is only found
+        when it's the same as the latest time before it, which is always the case for a sorted file.
+        The gaps are measured from the latest time so far, so an out-of-order row does not cause a false gap.
+
+        Args:
+            chunk_size: the maximal number of rows checked at a time
+            max_issues_per_kind: the maximal number of the detailed problems kept for each kind,
+                while all of them are counted
+
+        Returns:
+            the report of the problems
+
+        Raises:
+            FileNotFoundError: if the csv file does not exist
+        """
+        if chunk_size <= 0:
+            raise ValueError('chunk_size should greater than 0')
+
+        collector = _CsvIssueCollector(max_issues_per_kind)
+        row_count = 0
+
+        with self.__open_csv_file() as file:
+            reader = csv_reader(file)
+            header = next(reader, [])
+
+            column_getters = self.__column_getters_of(header)
+            for name, getter in zip(self.column_names, column_getters):
+                if getter is None:
+                    collector.add(CsvIssueKind.MISSING_COLUMN, None, name, None)
+
+            # A row has to reach the last present column, even if some other columns are missing.
+            required_width = max(
+                (position + 1 for position, name in enumerate(header) if name in self.column_names),
+                default=0
+            )
+
+            # Skip the blank lines, which is the same as `DictReader`.
+            numbered_rows = ((reader.line_num, row) for row in reader if row)
+            latest_time: int | None = None
+
+            while chunk := list(islice(numbered_rows, chunk_size)):
+                row_count += len(chunk)
+
+                line_numbers: list[int] = []
+                rows: list[list[str]] = []
+
+                for line_number, row in chunk:
+                    if len(row) < required_width:
+                        collector.add(CsvIssueKind.SHORT_ROW, line_number, None, ','.join(row))
+                    else:
+                        line_numbers.append(line_number)
+                        rows.append(row)
+
+                latest_time = self.__check_rows(collector, line_numbers, rows, column_getters, latest_time)
+
+        return collector.to_report(row_count)
+
+    def __check_rows(
+            self,
+            collector: '_CsvIssueCollector',
+            line_numbers: list[int],
+            rows: list[list[str]],
+            column_getters: tuple[itemgetter | None, ...],
+            latest_time: int | None,
+    ) -> int | None:
+        """
+        Check a chunk of rows column by column.
+
+        Returns:
+            the latest valid time so far, including the given one, to be continued by the next chunk
+        """
+        columns: dict[str, list[int | float | None]] = {}
+
+        for index, (name, getter) in enumerate(zip(self.column_names, column_getters)):
+            if getter is not None:
+                columns[name] = _convert_column(
+                    collector, name, map(getter, rows), line_numbers, int if index == 0 else float
+                )
+
+        for name in (self.VOLUME_FROM_COL_NAME, self.VOLUME_TO_COL_NAME):
+            volumes = columns.get(name, ())
+            for position in [position for position, volume in enumerate(volumes) if volume is not None and volume <= 0]:
+                collector.add(CsvIssueKind.NON_POSITIVE_VOLUME, line_numbers[position], name, str(volumes[position]))
+
+        for line_number, the_time in zip(line_numbers, columns.get(self.TIME_COL_NAME, ())):
+            if the_time is None:
+                continue
+
+            if latest_time is not None and the_time - latest_time != SECONDS_PER_DAY:
+                if the_time == latest_time:
+                    collector.add(CsvIssueKind.DUPLICATE_TIME, line_number, self.TIME_COL_NAME, str(the_time))
+                elif the_time < latest_time:
+                    collector.add(CsvIssueKind.OUT_OF_ORDER_TIME, line_number, self.TIME_COL_NAME, str(the_time))
+                elif the_time - latest_time > SECONDS_PER_DAY:
+                    collector.add(
+                        CsvIssueKind.DATE_GAP,
+                        line_number,
+                        self.TIME_COL_NAME,
+                        f"{(the_time - latest_time) // SECONDS_PER_DAY - 1} days missing before {the_time}"
+                    )
+
+            if latest_time is None or the_time > latest_time:
+                latest_time = the_time
+
+        return latest_time
+
     def to_crypto_records(self, raw_csv: CSV | None = None) -> tuple[CryptoRecord]:
-        _raw_csv: Final[CSV] = raw_csv if raw_csv is not None else self.__read_csv_rows()
+        if self.__validation_mode is ValidationMode.BULK:
+            return self.__to_crypto_records_in_bulk(raw_csv)
+
+        _raw_csv: Final[Iterable[dict[str, str]]] = raw_csv if raw_csv is not None else self.__iter_csv_rows()
 
         records: Final[list[CryptoRecord]] = []
 
-        for row in _raw_csv:
-            records.append(self.__from_row_to_crypto_compare_record(row))
+        with using_validation_mode(self.__validation_mode):
+            for row in _raw_csv:
+                records.append(self.__from_row_to_crypto_compare_record(row))
 
         # Sort the records by the time to enhance the performance of the binary search.
-        records.sort(key=lambda x: x.the_time)
+        # The exported data is almost always sorted already, so the sorting is skipped in that case.
+        if not all(former.the_time <= latter.the_time for former, latter in pairwise(records)):
+            records.sort(key=lambda x: x.the_time)
+
+        positions = positions_of_unique_times([record.the_time for record in records], self.__duplicate_time_policy)
+
+        return tuple(records) if positions is None else tuple(records[position] for position in positions)
+
+    def __to_crypto_records_in_bulk(self, raw_csv: CSV | None) -> tuple[CryptoRecord]:
+        # Parse the rows into typed columns first, so every value is already converted to the type of its column,
+        # then validate the type of each column once, and build the records without validating them one by one.
+        series = self.to_crypto_series(raw_csv)
+
+        CryptoRecord.validate_columns(dict(zip(CryptoSeries.COLUMN_NAMES, series.columns())))
+
+        with using_validation_mode(ValidationMode.OFF):
+            return series.to_records()
+
+    def to_crypto_series(self, raw_csv: CSV | None = None) -> CryptoSeries:
+        """
+        Same as :meth:`to_crypto_records`, but the rows are written into the columns of a :class:`CryptoSeries`
+        directly, without creating a :class:`CryptoRecord` for each row.
+        """
+        if raw_csv is not None:
+            series = self.__from_rows_to_crypto_series(raw_csv)
+        else:
+            chunks = tuple(self.__iter_file_chunks(DEFAULT_CHUNK_SIZE))
+            series = chunks[0] if len(chunks) == 1 else CryptoSeries.concatenate(chunks)
+
+        # Sort the records by the time to enhance the performance of the binary search.
+        return series.sorted_by_time().with_duplicate_times(self.__duplicate_time_policy)
+
+    def iter_series_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[CryptoSeries]:
+        """
+        Parse the csv file incrementally, and yield its rows as a sequence of :class:`CryptoSeries` chunks.
+        At most `chunk_size` rows are held in memory at the same time (plus the chunks kept by the caller),
+        so arbitrarily large files can be aggregated chunk by chunk.
+
+        Note that the chunks are yielded in the order of the file, they are NOT sorted by the time.
+
+        Args:
+            chunk_size: the maximal number of rows of each chunk
+
+        Returns:
+            an iterator of non-empty chunks
+        """
+        if chunk_size <= 0:
+            raise ValueError('chunk_size should greater than 0')
+
+        yield from self.__iter_file_chunks(chunk_size)
+
+    def iter_records(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[CryptoRecord]:
+        """
+        Same as :meth:`iter_series_chunks`, but yields the records one by one, in the order of the file.
+        """
+        for chunk in self.iter_series_chunks(chunk_size):
+            yield from chunk
+
+
+class _CsvIssueCollector:
+    """
+    Count all the problems, but keep only the first few of each kind, so the memory usage is bounded.
+    """
+
+    __max_issues_per_kind: Final[int]
+    __issue_counts: Final[Counter[CsvIssueKind]]
+    __issues: Final[list[CsvIssue]]
+
+    def __init__(self, max_issues_per_kind: int) -> None:
+        if max_issues_per_kind < 0:
+            raise ValueError('max_issues_per_kind should greater than or equal to 0')
+
+        self.__max_issues_per_kind = max_issues_per_kind
+        self.__issue_counts = Counter()
+        self.__issues = []
+
+    def add(self, kind: CsvIssueKind, line_number: int | None, column: str | None, value: str | None) -> None:
+        self.__issue_counts[kind] += 1
+
+        if self.__issue_counts[kind] <= self.__max_issues_per_kind:
+            self.__issues.append(CsvIssue(kind.value, line_number, column, value))
+
+    def to_report(self, row_count: int) -> CsvValidationReport:
+        return CsvValidationReport(
+            row_count=row_count,
+            issue_counts={kind.value: count for kind, count in self.__issue_counts.items()},
+            issues=tuple(sorted(self.__issues, key=lambda issue: issue.line_number or 0)),
+        )
+
+
+def _convert_column(
+        collector: _CsvIssueCollector,
+        name: str,
+        cells: Iterable[str],
+        line_numbers: list[int],
+        convert: Callable[[str], int | float],
+) -> list[int | float | None]:
+    """
+    Convert the whole column at once, and only look into the cells one by one when some of them are unparsable.
+    The unparsable cells are reported and converted to `None`.
+    """
+    cells = list(cells)
+
+    try:
+        return list(map(convert, cells))
+    except ValueError:
+        pass
+
+    values: list[int | float | None] = []
+
+    for line_number, cell in zip(line_numbers, cells):
+        try:
+            values.append(convert(cell))
+        except ValueError:
+            collector.add(CsvIssueKind.UNPARSABLE_CELL, line_number, name, cell)
+            values.append(None)
+
+    return values
+
+
+def merge_csv_files(
+        csv_file_paths: Iterable[str],
+        parser_mode: CsvParserMode = CsvParserMode.POSITIONAL,
+        duplicate_time_policy: DuplicateTimePolicy = DuplicateTimePolicy.KEEP,
+) -> CryptoSeries:
+    """
+    Read several csv files (e.g. yearly exports) and merge them into one series sorted by the time.
+    Each file is sorted on its own, then they are merged by :meth:`CryptoSeries.merge`,
+    instead of concatenating and sorting all the records.
+
+    Args:
+        csv_file_paths: the paths of the csv files
+        parser_mode: how the csv files are parsed, see :class:`CsvParserMode`
+        duplicate_time_policy: how to handle the records sharing the same time, within or across the files
+
+    Returns:
+        the merged dataset
+    """
+    return CryptoSeries.merge(
+        (CryptoCompareCsvDto(path, parser_mode).to_crypto_series() for path in csv_file_paths),
+        duplicate_time_policy
+    )
+
+
+class CryptoCompareCsvTail:
+    """
+    Keep a dataset in sync with a csv file which only grows at the end, e.g. a live export.
+
+    The byte offset after the last parsed row is remembered, so every :meth:`refresh` only parses
+    the rows appended since the last time, and appends them to the same :class:`CryptoSeries` in place.
+    A row is only parsed after its line break is written, so a partially written row is never read.
+
+    The file is read from scratch again if it's not the same file anymore (e.g. rotated or replaced),
+    or the bytes before the offset have been changed (e.g. truncated or rewritten in place).
+    """
+
+    __csv_file_path: Final[str]
+    __dto: Final[CryptoCompareCsvDto]
+    __header: list[str] | None
+    __offset: int
+    __series: CryptoSeries
+    __file_id: tuple[int, int] | None
+    __tail: bytes
+
+    def __init__(self, csv_file_path: str) -> None:
+        self.__csv_file_path = csv_file_path
+        self.__dto = CryptoCompareCsvDto(csv_file_path)
+        self.__reset()
+        self.refresh()
+
+    def __reset(self) -> None:
+        self.__header = None
+        self.__offset = 0
+        self.__series = CryptoSeries.empty()
+        self.__file_id = None
+        self.__tail = b''
+
+    @property
+    def series(self) -> CryptoSeries:
+        """
+        The dataset read so far. The same object is extended by :meth:`refresh`,
+        unless the file has been truncated or replaced, which makes it read from scratch.
+        """
+        return self.__series
+
+    @property
+    def offset(self) -> int:
+        """
+        The byte offset right after the last parsed row.
+        """
+        return self.__offset
+
+    def __is_appended_to(self, file: BinaryIO, file_id: tuple[int, int], size: int) -> bool:
+        # Whether the file is the one read so far, with only the rows appended after the offset.
+        if self.__offset == 0:
+            return True
+
+        if file_id != self.__file_id or size < self.__offset:
+            return False
+
+        file.seek(self.__offset - len(self.__tail))
+        return file.read(len(self.__tail)) == self.__tail
+
+    def __read_complete_lines(self) -> bytes:
+        try:
+            with open(self.__csv_file_path, mode='rb') as file:
+                stat = os.fstat(file.fileno())
+                file_id = stat.st_dev, stat.st_ino
+
+                if not self.__is_appended_to(file, file_id, stat.st_size):
+                    self.__reset()
+
+                self.__file_id = file_id
+                file.seek(self.__offset)
+                appended = file.read()
+        except FileNotFoundError as e:
+            raise FileNotFoundError(
+                'Error: the dataset is not found.'
+                'Please check if the dataset is in the correct location.'
+            ) from e
+
+        return appended[:appended.rfind(b'\n') + 1]
+
+    def refresh(self) -> int:
+        """
+        Parse the rows appended to the csv file since the last refresh, and append them to :attr:`series`.
+
+        Returns:
+            the number of the appended records
+
+        Raises:
+            KeyError: if some required columns are missing in the header, and there are rows
+            ValueError: if the appended records are earlier than the existing ones
+            BufferError: if a column of :attr:`series` is still exported, see :meth:`CryptoSeries.extend`.
+                Nothing is read then, so the same rows are appended by the next refresh.
+        """
+        lines = self.__read_complete_lines()
+
+        if len(lines) == 0:
+            return 0
+
+        is_first_read = self.__offset == 0
+        rows = csv_reader(lines.decode('utf-8-sig' if is_first_read else 'utf-8').splitlines())
+
+        # The first line is the header even if it's blank, which is the same as `CryptoCompareCsvDto`,
+        # and there's always one as the lines are not empty.
+        header = self.__header if self.__header is not None else next(rows)
+        appended = self.__dto.positional_rows_to_crypto_series(header, list(filter(None, rows)))
+
+        # The rows following the header are sorted like any other way of reading the dataset,
+        # while the appended ones should be sorted already.
+        self.__series.extend(appended.sorted_by_time() if self.__header is None else appended)
+
+        # Only advanced after the records are appended, so the same rows are read again if it fails.
+        self.__header = header
+        self.__offset += len(lines)
+        self.__tail = (self.__tail + lines)[-TAIL_CHECK_SIZE:]
 
-        return tuple(records)
+        return len(appended)
@@ -0,0 +1,135 @@
+import math
+from array import array
+from collections.abc import Callable
+from itertools import pairwise
+from typing import Final
+
+from compute_backend import numpy_or_none, numpy_to_array
+from enums import DerivedColumnName
+from series import CryptoSeries, VALUE_TYPECODE
+
+__all__ = ["derived_column"]
+
+
+def __daily_average_prices_of(storage: CryptoSeries) -> array:
+    # A day without any exchange is treated as 0.
+    if (np := numpy_or_none()) is not None:
+        volume_from = np.asarray(storage.volume_from, dtype=np.float64)
+        prices = np.zeros_like(volume_from)
+        np.divide(np.asarray(storage.volume_to, dtype=np.float64), volume_from, out=prices, where=volume_from != 0)
+        return numpy_to_array(prices)
+
+    return array(VALUE_TYPECODE, (
+        volume_to / volume_from if volume_from != 0 else 0.0
+        for volume_to, volume_from in zip(storage.volume_to, storage.volume_from)
+    ))
+
+
+def __typical_prices_of(storage: CryptoSeries) -> array:
+    if (np := numpy_or_none()) is not None:
+        return numpy_to_array((
+            np.asarray(storage.high, dtype=np.float64) +
+            np.asarray(storage.low, dtype=np.float64) +
+            np.asarray(storage.close_amount, dtype=np.float64)
+        ) / 3)
+
+    return array(VALUE_TYPECODE, (
+        (high + low + close_amount) / 3
+        for high, low, close_amount in zip(storage.high, storage.low, storage.close_amount)
+    ))
+
+
+def __daily_returns_of(storage: CryptoSeries) -> array:
+    # The first day has no previous day, and a previous close price of 0 has no meaningful return, both are 0.
+    if (np := numpy_or_none()) is not None:
+        close_amounts = np.asarray(storage.close_amount, dtype=np.float64)
+        returns = np.zeros_like(close_amounts)
+        np.divide(close_amounts[1:], close_amounts[:-1], out=returns[1:], where=close_amounts[:-1] != 0)
+        np.subtract(returns[1:], 1.0, out=returns[1:], where=close_amounts[:-1] != 0)
+        return numpy_to_array(returns)
+
+    returns = array(VALUE_TYPECODE, [0.0] * min(len(storage), 1))
+    returns.extend(
+        close_amount / previous_close_amount - 1 if previous_close_amount != 0 else 0.0
+        for previous_close_amount, close_amount in pairwise(storage.close_amount)
+    )
+    return returns
+
+
+def __log_returns_of(storage: CryptoSeries) -> array:
+    # The same as the daily returns, and the logarithm of a non-positive ratio is also treated as 0.
+    if (np := numpy_or_none()) is not None:
+        close_amounts = np.asarray(storage.close_amount, dtype=np.float64)
+        is_defined = (close_amounts[:-1] > 0) & (close_amounts[1:] > 0)
+        returns = np.zeros_like(close_amounts)
+        np.divide(close_amounts[1:], close_amounts[:-1], out=returns[1:], where=is_defined)
+        np.log(returns[1:], out=returns[1:], where=is_defined)
+        return numpy_to_array(returns)
+
+    returns = array(VALUE_TYPECODE, [0.0] * min(len(storage), 1))
+    returns.extend(
+        math.log(close_amount / previous_close_amount) if previous_close_amount > 0 and close_amount > 0 else 0.0
+        for previous_close_amount, close_amount in pairwise(storage.close_amount)
+    )
+    return returns
+
+
+__DERIVATIONS: Final[dict[DerivedColumnName, Callable[[CryptoSeries], array]]] = {
+    DerivedColumnName.DAILY_AVERAGE_PRICE: __daily_average_prices_of,
+    DerivedColumnName.TYPICAL_PRICE: __typical_prices_of,
+    DerivedColumnName.DAILY_RETURN: __daily_returns_of,
+    DerivedColumnName.LOG_RETURN: __log_returns_of,
+}
+
+# The number of the previous records each derivation looks at, e.g. the returns need the previous close price.
+__LOOK_BEHINDS: Final[dict[DerivedColumnName, int]] = {
+    DerivedColumnName.DAILY_AVERAGE_PRICE: 0,
+    DerivedColumnName.TYPICAL_PRICE: 0,
+    DerivedColumnName.DAILY_RETURN: 1,
+    DerivedColumnName.LOG_RETURN: 1,
+}
+
+
+def __extended_column_of(name: DerivedColumnName, storage: CryptoSeries, column: array, length: int) -> array:
+    # Only the appended records (and the ones they look behind) are derived.
+    start = max(length - __LOOK_BEHINDS[name], 0)
+    appended = __DERIVATIONS[name](storage[start:])[length - start:]
+
+    try:
+        column.extend(appended)
+        return column
+    except BufferError:
+        # The column is still exported by a memoryview, so it can not be resized, the values are copied instead.
+        extended_column = column[:]
+        extended_column.extend(appended)
+        return extended_column
+
+
+def derived_column(series: CryptoSeries, name: DerivedColumnName | str) -> memoryview:
+    """
+    Get a column derived from the other columns of the dataset, e.g. the daily average prices.
+
+    A derived column is computed only once for all the records of the dataset, at the first time it's used,
+    then it's shared by every view of the dataset, and only the appended records are derived after it is extended.
+    The returns of the first record of a view are still relative to the previous record of the dataset.
+
+    Args:
+        series: the dataset
+        name: the name of the derived column, see :class:`DerivedColumnName`
+
+    Returns:
+        a read-only column aligned to the records of the series
+
+    Raises:
+        ValueError: if there's no derived column with the name
+    """
+    _name: Final[DerivedColumnName] = DerivedColumnName(name)
+
+    column = series.derive_from_storage(
+        (derived_column, _name),
+        __DERIVATIONS[_name],
+        lambda storage, previous_column, length: __extended_column_of(_name, storage, previous_column, length)
+    )
+    offset = series.storage_offset
+
+    return memoryview(column)[offset:offset + len(series)].toreadonly()
@@ -9,3 +9,85 @@ class MarketTrend(AutoCheckRecognizableStrEnum):
     INCREASING = 'increasing'
     DECREASING = 'decreasing'
     OTHER = 'other'
+
+
+@unique
+class CsvParserMode(AutoCheckRecognizableStrEnum):
+    # Resolve the header to column positions once, and convert the columns in bulk.
+    POSITIONAL = 'positional'
+    # Build a `dict` for each row by `csv.DictReader`.
+    DICT = 'dict'
+
+
+@unique
+class DuplicateTimePolicy(AutoCheckRecognizableStrEnum):
+    # Keep all the records sharing the same time.
+    KEEP = 'keep'
+    # Keep only the first one (in the order they are read) of the records sharing the same time.
+    FIRST = 'first'
+    # Keep only the last one (in the order they are read) of the records sharing the same time.
+    LAST = 'last'
+    # Raise `DuplicateTimeError` when finding any records sharing the same time.
+    ERROR = 'error'
+
+
+@unique
+class ValidationMode(AutoCheckRecognizableStrEnum):
+    # Validate the fields of every constructed instance.
+    FULL = 'full'
+    # Validate the fields of one out of every few constructed instances.
+    SAMPLED = 'sampled'
+    # Never validate.
+    OFF = 'off'
+    # Do not validate each instance, the loader validates the whole columns once instead.
+    BULK = 'bulk'
+
+
+@unique
+class PartAMetric(AutoCheckRecognizableStrEnum):
+    # Each value is the name of the function of part A computing the metric.
+    HIGHEST_PRICE = 'highest_price'
+    LOWEST_PRICE = 'lowest_price'
+    MAX_VOLUME = 'max_volume'
+    BEST_AVG_PRICE = 'best_avg_price'
+    MOVING_AVERAGE = 'moving_average'
+
+
+@unique
+class ComputeBackend(AutoCheckRecognizableStrEnum):
+    # Use NumPy when it is installed, otherwise fall back to pure Python.
+    AUTO = 'auto'
+    # Always compute in pure Python.
+    PYTHON = 'python'
+    # Always compute by NumPy, which must be installed.
+    NUMPY = 'numpy'
+
+
+@unique
+class DerivedColumnName(AutoCheckRecognizableStrEnum):
+    # The total volume in USD divided by the total volume in BTC of a day.
+    DAILY_AVERAGE_PRICE = 'daily_average_price'
+    # The mean of the high, the low and the close price of a day.
+    TYPICAL_PRICE = 'typical_price'
+    # The change of the close price from the previous day, relative to the previous close price.
+    DAILY_RETURN = 'daily_return'
+    # The natural logarithm of the ratio of the close price to the previous close price.
+    LOG_RETURN = 'log_return'
+
+
+@unique
+class CsvIssueKind(AutoCheckRecognizableStrEnum):
+    # A required column is not in the header.
+    MISSING_COLUMN = 'missing_column'
+    # A row has fewer cells than the header.
+    SHORT_ROW = 'short_row'
+    # A cell can not be parsed as a number.
+    UNPARSABLE_CELL = 'unparsable_cell'
+    # A volume is zero or negative.
+    NON_POSITIVE_VOLUME = 'non_positive_volume'
+    # A row has the same time as the previous row.
+    DUPLICATE_TIME = 'duplicate_time'
+    # A row is earlier than the previous row.
+    OUT_OF_ORDER_TIME = 'out_of_order_time'
+    # More than one day passed since the previous row.
+    DATE_GAP = 'date_gap'
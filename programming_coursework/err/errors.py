@@ -25,3 +25,11 @@ class StartDateAfterEndDateError(__CustomErrorBase):
             'end date must be larger than start date'
             f"{msg if msg is not None else ''}"
         )
+
+
+class DuplicateTimeError(__CustomErrorBase):
+    def __init__(self, msg: str | None = None):
+        super().__init__(
+            'multiple records share the same time'
+            f"{msg if msg is not None else ''}"
+        )
@@ -8,7 +8,7 @@ import importlib
 import sys
 
 from context import use_default_crypto_data_set
-from model import CryptoRecord
+from series import CryptoSeries
 from utils.colors import ConsoleColorWrapper, ConsoleColors
 
 PACKAGE_ENTRY_POINT_NAME = 'run'
@@ -40,7 +40,7 @@ class Importer:
     def __str__(self):
         return str(self.name)
 
-    def run(self, data_: tuple[CryptoRecord]):
+    def run(self, data_: CryptoSeries):
         # if package is truly exists,
         if self.package:
             # if user provide the sub package entry function suffix serial number,
@@ -61,7 +61,7 @@ class Importer:
             sys.exit(1)
 
 
-def main(data_: tuple[CryptoRecord]):
+def main(data_: CryptoSeries):
     # if using cli arguments to specify target function,
     if len(sys.argv) > 1:
         # get exercise name.
@@ -1,8 +1,17 @@
+from array import array
 from dataclasses import dataclass
 
 from utils import ValidatableDataClass, JsonSerializable
 
-__all__ = ["CryptoRecord", "empty_record"]
+__all__ = [
+    "CrossoverSweepResult",
+    "CryptoRecord",
+    "CsvIssue",
+    "CsvValidationReport",
+    "MovingAverageTable",
+    "RangeSummary",
+    "empty_record",
+]
 
 
 @dataclass(frozen=True)
@@ -29,4 +38,117 @@ class CryptoRecord(ValidatableDataClass, JsonSerializable):
     volume_to: float
 
 
+@dataclass(frozen=True)
+class RangeSummary(JsonSerializable):
+    """
+    This class represents the metrics of part A of the records within a date range.
+    All the metrics are 0 when there's no record in the range.
+
+    Attributes:
+        count: the number of records (i.e., days) in the range
+        highest_price: highest BTC price in the range
+        lowest_price: lowest BTC price in the range (accurate to 2 decimal places)
+        max_volume: maximal daily volume in BTC in the range
+        best_avg_price: highest daily average price in the range
+        moving_average: average of the daily average prices in the range (accurate to 2 decimal places)
+        first_close: last BTC price of the first day in the range
+        last_close: last BTC price of the last day in the range
+    """
+
+    count: int
+    highest_price: float
+    lowest_price: float
+    max_volume: float
+    best_avg_price: float
+    moving_average: float
+    first_close: float
+    last_close: float
+
+
+@dataclass(frozen=True)
+class CrossoverSweepResult(JsonSerializable):
+    """
+    This class represents the outcome of the crossover method with a pair of window sizes over a date range.
+
+    Attributes:
+        short_scope: the window size of the short moving average
+        long_scope: the window size of the long moving average
+        start_date: the start of the date range, in "dd/mm/yyyy" format
+        end_date: the end of the date range, in "dd/mm/yyyy" format
+        buy_list: the dates that we should buy, in "dd/mm/yyyy" format
+        sell_list: the dates that we should sell, in "dd/mm/yyyy" format
+        trade_count: the number of times of buying, following the signals with a single position
+        simulated_return: the relative gain of following the signals with a single position,
+            trading at the close prices, and selling at the last close price if still holding at the end
+    """
+
+    short_scope: int
+    long_scope: int
+    start_date: str
+    end_date: str
+    buy_list: tuple[str, ...]
+    sell_list: tuple[str, ...]
+    trade_count: int
+    simulated_return: float
+
+
+@dataclass(frozen=True)
+class MovingAverageTable:
+    """
+    This class represents the moving averages of several window sizes over the same dates.
+
+    Attributes:
+        the_time: the dates, epoch timestamps in second (in UTC time zone)
+        averages: the moving averages of each window size, aligned to `the_time`
+    """
+
+    the_time: array
+    averages: dict[int, array]
+
+    def to_dict(self, scope: int) -> dict[int, float]:
+        """
+        The moving averages of the window size keyed by the date,
+        the same form as :func:`partc.moving_avg_short` and :func:`partc.moving_avg_long`.
+        """
+        return dict(zip(self.the_time, self.averages[scope]))
+
+
+@dataclass(frozen=True)
+class CsvIssue(JsonSerializable):
+    """
+    This class represents a problem found in a csv file.
+
+    Attributes:
+        kind: the value of a :class:`CsvIssueKind`
+        line_number: the line of the csv file where the problem is, `None` for the problems of the header
+        column: the name of the column where the problem is, if any
+        value: the problematic cell, or a description of the problem
+    """
+
+    kind: str
+    line_number: int | None
+    column: str | None
+    value: str | None
+
+
+@dataclass(frozen=True)
+class CsvValidationReport(JsonSerializable):
+    """
+    This class represents all the problems found in a csv file by a single pass.
+
+    Attributes:
+        row_count: the number of data rows, excluding the header and blank lines
+        issue_counts: the number of problems of each kind, keyed by the value of a :class:`CsvIssueKind`
+        issues: the details of the problems, only the first few of each kind are kept
+    """
+
+    row_count: int
+    issue_counts: dict[str, int]
+    issues: tuple[CsvIssue, ...]
+
+    @property
+    def is_valid(self) -> bool:
+        return len(self.issue_counts) == 0
+
+
 empty_record = CryptoRecord(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
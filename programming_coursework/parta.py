@@ -1,15 +1,25 @@
-from statistics import mean
+import math
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Final
 from unittest import TestCase
 
-from context import expect_illegal_data_type
-from model import CryptoRecord, empty_record
+from compute_backend import available_compute_backends, using_compute_backend
+from context import expect_illegal_data_type, resolve_crypto_series
+from derived_columns import derived_column
+from enums import DerivedColumnName, PartAMetric
+from model import RangeSummary
+from query_cache import QueryResultCache, memoize_range_query, using_query_result_cache
+from range_index import INDEXED_COLUMN_NAMES, max_between, mean_between, min_between
+from series import CryptoSeries, TIME_TYPECODE, VALUE_TYPECODE
 from testdata.parta import *
 from tester import Tester, use_validated_date
 from utils import redirect_to_main
 
 
 @expect_illegal_data_type
-def highest_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+@memoize_range_query
+def highest_price(data_: CryptoSeries, start_date: str, end_date: str) -> float:
     """
     Given the data, a start date, and an end date (both are string with “dd/mm/yyyy” format),
     return a positive or negative floating point number,
@@ -24,17 +34,18 @@ def highest_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) ->
         the highest price in the given date range
     """
 
-    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    return __highest_price_between(data_, *use_validated_date(start_date, end_date))
+
 
-    return max(
-        (record for record in data_ if start_date_utc <= record.the_time <= end_date_utc),
-        key=lambda x: x.high,
-        default=empty_record
-    ).high
+def __highest_price_between(data_: CryptoSeries, start_date_utc: int, end_date_utc: int) -> float:
+    highest = max_between(data_, 'high', start_date_utc, end_date_utc)
+
+    return highest if highest is not None else 0.0
 
 
 @expect_illegal_data_type
-def lowest_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+@memoize_range_query
+def lowest_price(data_: CryptoSeries, start_date: str, end_date: str) -> float:
     """
     Given the data, a start date, and an end date (both are string with “dd/mm/yyyy” format),
     return a positive or negative floating point number (accurate to 2 decimal places),
@@ -49,20 +60,19 @@ def lowest_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) ->
         the lowest price in the given date range
     """
 
-    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    return __lowest_price_between(data_, *use_validated_date(start_date, end_date))
+
+
+def __lowest_price_between(data_: CryptoSeries, start_date_utc: int, end_date_utc: int) -> float:
+    lowest = min_between(data_, 'low', start_date_utc, end_date_utc)
 
     # Fix the float number to 2 decimal places
-    return round(
-        min(
-            (record for record in data_ if start_date_utc <= record.the_time <= end_date_utc),
-            key=lambda x: x.low,
-            default=empty_record
-        ).low, 2
-    )
+    return round(lowest if lowest is not None else 0.0, 2)
 
 
 @expect_illegal_data_type
-def max_volume(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+@memoize_range_query
+def max_volume(data_: CryptoSeries, start_date: str, end_date: str) -> float:
     """
     Given the data, a start date, and an end date (both are string with “dd/mm/yyyy” format),
     return a floating point number that is the maximal daily amount of exchanged BTC currency of a single day
@@ -77,17 +87,18 @@ def max_volume(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> fl
         the maximal daily amount of exchanged BTC currency of a single day in the given date range
     """
 
-    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    return __max_volume_between(data_, *use_validated_date(start_date, end_date))
 
-    return max(
-        (record for record in data_ if start_date_utc <= record.the_time <= end_date_utc),
-        key=lambda x: x.volume_from,
-        default=empty_record
-    ).volume_from
+
+def __max_volume_between(data_: CryptoSeries, start_date_utc: int, end_date_utc: int) -> float:
+    max_volume_from = max_between(data_, 'volume_from', start_date_utc, end_date_utc)
+
+    return max_volume_from if max_volume_from is not None else 0.0
 
 
 @expect_illegal_data_type
-def best_avg_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+@memoize_range_query
+def best_avg_price(data_: CryptoSeries, start_date: str, end_date: str) -> float:
     """
     Given the data, a start date, and an end date (both are string with “dd/mm/yyyy” format),
     return the highest daily average price of a single BTC coin in USD within the given period.
@@ -103,22 +114,21 @@ def best_avg_price(data_: tuple[CryptoRecord], start_date: str, end_date: str) -
         the highest daily average price of a single BTC coin in USD in the given date range
     """
 
-    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    return __best_avg_price_between(data_, *use_validated_date(start_date, end_date))
 
-    highest_price_record = max(
-        (record for record in data_ if start_date_utc <= record.the_time <= end_date_utc),
-        key=lambda x: x.volume_to / x.volume_from,
-        default=empty_record
-    )
 
-    if highest_price_record.volume_from == 0:
+def __best_avg_price_between(data_: CryptoSeries, start_date_utc: int, end_date_utc: int) -> float:
+    highest_avg_price = max_between(data_, DerivedColumnName.DAILY_AVERAGE_PRICE, start_date_utc, end_date_utc)
+
+    if highest_avg_price is None:
         return 0
 
-    return highest_price_record.volume_to / highest_price_record.volume_from
+    return highest_avg_price
 
 
 @expect_illegal_data_type
-def moving_average(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+@memoize_range_query
+def moving_average(data_: CryptoSeries, start_date: str, end_date: str) -> float:
     """
     Should return the average BTC currency price over the given period of time (accurate to 2 decimal places).
     The average price of a single day is calculated by :func:`best_avg_price`.
@@ -132,17 +142,110 @@ def moving_average(data_: tuple[CryptoRecord], start_date: str, end_date: str) -
         the average BTC currency price over the given period of time
     """
 
+    return __moving_average_between(data_, *use_validated_date(start_date, end_date))
+
+
+def __moving_average_between(data_: CryptoSeries, start_date_utc: int, end_date_utc: int) -> float:
+    average = mean_between(data_, DerivedColumnName.DAILY_AVERAGE_PRICE, start_date_utc, end_date_utc)
+
+    return round(average if average is not None else 0, 2)
+
+
+@expect_illegal_data_type
+@memoize_range_query
+def range_summary(data_: CryptoSeries, start_date: str, end_date: str) -> RangeSummary:
+    """
+    Given the data, a start date, and an end date (both are string with “dd/mm/yyyy” format),
+    return all the metrics of part A within the given period at once,
+    along with the number of days and the first and the last close prices.
+    The dates are parsed only once, and every metric is answered by the indexes of the dataset.
+
+    Args:
+        data_: the data from a data_source file
+        start_date: string in "dd/mm/yyyy" format
+        end_date: string in "dd/mm/yyyy" format
+
+    Returns:
+        the summary of the given date range
+    """
+
     start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
 
-    frame = [
-        record.volume_to / record.volume_from
-        for record in data_ if start_date_utc <= record.the_time <= end_date_utc
-    ]
+    close_amounts = data_.between(start_date_utc, end_date_utc).close_amount
 
-    return round(mean(frame) if len(frame) > 0 else 0, 2)
+    if len(close_amounts) == 0:
+        return RangeSummary(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
 
+    return RangeSummary(
+        count=len(close_amounts),
+        highest_price=__highest_price_between(data_, start_date_utc, end_date_utc),
+        lowest_price=__lowest_price_between(data_, start_date_utc, end_date_utc),
+        max_volume=__max_volume_between(data_, start_date_utc, end_date_utc),
+        best_avg_price=__best_avg_price_between(data_, start_date_utc, end_date_utc),
+        moving_average=__moving_average_between(data_, start_date_utc, end_date_utc),
+        first_close=close_amounts[0],
+        last_close=close_amounts[-1],
+    )
 
-def test_highest_price(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+
+# How each metric is computed from the dataset and a validated date range in UTC timestamps.
+__METRIC_QUERIES: Final[dict[PartAMetric, Callable[[CryptoSeries, int, int], float]]] = {
+    PartAMetric.HIGHEST_PRICE: __highest_price_between,
+    PartAMetric.LOWEST_PRICE: __lowest_price_between,
+    PartAMetric.MAX_VOLUME: __max_volume_between,
+    PartAMetric.BEST_AVG_PRICE: __best_avg_price_between,
+    PartAMetric.MOVING_AVERAGE: __moving_average_between,
+}
+
+
+def query_many(
+        data_: Any,
+        metrics: Iterable[PartAMetric | str],
+        ranges: Iterable[tuple[str, str]],
+) -> dict[PartAMetric, list[float]]:
+    """
+    Evaluate the metrics over many date ranges at once, e.g. to precompute a grid of a report.
+    It's the same as calling the functions of the metrics for every range,
+    but each distinct range is parsed and validated only once, and the data is dispatched only once,
+    while every metric of a range is answered by the indexes of the dataset without scanning it.
+
+    Args:
+        data_: the data from a data_source file, resolved by :func:`context.resolve_crypto_series`
+        metrics: the metrics, or the names of the functions of them, e.g. `highest_price`
+        ranges: pairs of a start date and an end date, both are strings in "dd/mm/yyyy" format
+
+    Returns:
+        the table mapping each metric to its results, which are in the same order as the given ranges
+
+    Raises:
+        ValueError: if any metric or date is invalid
+        StartDateAfterEndDateError: if the start date of any range is after its end date
+    """
+    queries = {PartAMetric(metric): __METRIC_QUERIES[PartAMetric(metric)] for metric in metrics}
+
+    series = resolve_crypto_series(data_, __name__)
+
+    given_ranges = list(ranges)
+    validated_ranges = {
+        date_range: use_validated_date(*date_range)
+        for date_range in dict.fromkeys(given_ranges)
+    }
+
+    results = {
+        metric: {
+            date_range: query(series, *utc_range)
+            for date_range, utc_range in validated_ranges.items()
+        }
+        for metric, query in queries.items()
+    }
+
+    return {
+        metric: [results_of_metric[date_range] for date_range in given_ranges]
+        for metric, results_of_metric in results.items()
+    }
+
+
+def test_highest_price(tester: TestCase, data: CryptoSeries) -> None:
     for test in highest_price_test_data:
         tester.assertEqual(
             highest_price(data, test['start_date'], test['end_date']),
@@ -150,7 +253,7 @@ def test_highest_price(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def test_lowest_price(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_lowest_price(tester: TestCase, data: CryptoSeries) -> None:
     for test in lowest_price_test_data:
         tester.assertEqual(
             lowest_price(data, test['start_date'], test['end_date']),
@@ -158,7 +261,7 @@ def test_lowest_price(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def test_max_volume(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_max_volume(tester: TestCase, data: CryptoSeries) -> None:
     for test in max_volume_test_data:
         tester.assertEqual(
             max_volume(data, test['start_date'], test['end_date']),
@@ -166,7 +269,7 @@ def test_max_volume(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def test_best_avg_value(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_best_avg_value(tester: TestCase, data: CryptoSeries) -> None:
     for test in best_avg_value_test_data:
         tester.assertEqual(
             best_avg_price(data, test['start_date'], test['end_date']),
@@ -174,7 +277,7 @@ def test_best_avg_value(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def test_moving_average(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_moving_average(tester: TestCase, data: CryptoSeries) -> None:
     for test in moving_average_test_data:
         tester.assertEqual(
             moving_average(data, test['start_date'], test['end_date']),
@@ -182,7 +285,150 @@ def test_moving_average(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def run(data_: tuple[CryptoRecord]) -> None:
+def test_query_many(tester: TestCase, data: CryptoSeries) -> None:
+    for metric, test_data in (
+            (PartAMetric.HIGHEST_PRICE, highest_price_test_data),
+            (PartAMetric.LOWEST_PRICE, lowest_price_test_data),
+            (PartAMetric.MAX_VOLUME, max_volume_test_data),
+            (PartAMetric.BEST_AVG_PRICE, best_avg_value_test_data),
+            (PartAMetric.MOVING_AVERAGE, moving_average_test_data),
+    ):
+        tester.assertEqual(
+            query_many(data, [metric], [(test['start_date'], test['end_date']) for test in test_data]),
+            {metric: [test['expected_result'] for test in test_data]}
+        )
+
+
+def test_range_summary(tester: TestCase, data: CryptoSeries) -> None:
+    for test in moving_average_test_data:
+        summary = range_summary(data, test['start_date'], test['end_date'])
+
+        tester.assertEqual(summary.moving_average, test['expected_result'])
+        tester.assertEqual(
+            summary.highest_price,
+            highest_price(data, test['start_date'], test['end_date'])
+        )
+        tester.assertEqual(
+            summary.last_close,
+            data.between(*use_validated_date(test['start_date'], test['end_date'])).close_amount[-1]
+        )
+
+
+def test_query_result_cache(tester: TestCase, data: CryptoSeries) -> None:
+    growing_data = CryptoSeries.from_records(data[:10].to_records())
+    start_date, end_date = '01/01/2000', '01/01/2100'
+
+    with using_query_result_cache(QueryResultCache(max_size=2)) as cache:
+        for test in highest_price_test_data:
+            for _ in range(2):
+                tester.assertEqual(
+                    highest_price(data, test['start_date'], test['end_date']),
+                    test['expected_result']
+                )
+
+        tester.assertEqual(cache.stats.hits, len(highest_price_test_data))
+
+        tester.assertEqual(max_volume(growing_data, start_date, end_date), max(data[:10].volume_from))
+        growing_data.extend(data[10:20])
+        tester.assertEqual(max_volume(growing_data, start_date, end_date), max(data[:20].volume_from))
+
+
+def test_extended_indexes(tester: TestCase, data: CryptoSeries) -> None:
+    for backend in available_compute_backends():
+        with using_compute_backend(backend):
+            growing_data = CryptoSeries.concatenate([data[:5]])
+            # Exported by a memoryview, so this derived column can not be extended in place.
+            daily_returns = derived_column(growing_data, DerivedColumnName.DAILY_RETURN)
+
+            for stop in (6, 7, 9, 40, 300, len(data)):
+                growing_data.extend(data[len(growing_data):stop])
+                built_data = CryptoSeries.concatenate([data[:stop]])
+
+                for name in DerivedColumnName.to_list():
+                    tester.assertEqual(
+                        derived_column(growing_data, name).tolist(),
+                        derived_column(built_data, name).tolist()
+                    )
+
+                times = data.the_time
+                for start in range(0, stop, max(stop // 7, 1)):
+                    for column_name in INDEXED_COLUMN_NAMES:
+                        for query in (max_between, min_between, mean_between):
+                            tester.assertEqual(
+                                query(growing_data, column_name, times[start], times[stop - 1]),
+                                query(built_data, column_name, times[start], times[stop - 1])
+                            )
+
+            tester.assertEqual(
+                daily_returns.tolist(),
+                derived_column(data[:5], DerivedColumnName.DAILY_RETURN).tolist()
+            )
+
+
+def test_derived_returns(tester: TestCase, data: CryptoSeries) -> None:
+    # The zero prices are in the middle, at the end of a view, and right before the appended records.
+    close_amounts = (100.0, 150.0, 0.0, 50.0, 0.0, 0.0, 25.0, 25.0, 75.0, 0.0, 30.0)
+
+    def series_of(prices: Sequence[float]) -> CryptoSeries:
+        return CryptoSeries(
+            array(TIME_TYPECODE, range(0, len(prices) * 86400, 86400)),
+            *(array(VALUE_TYPECODE, prices) for _ in range(6))
+        )
+
+    def expected_returns_of(prices: Sequence[float]) -> tuple[list[float], list[float]]:
+        daily_returns = [0.0] + [
+            price / previous_price - 1 if previous_price != 0 else 0.0
+            for previous_price, price in zip(prices, prices[1:])
+        ]
+        log_returns = [0.0] + [
+            math.log(price / previous_price) if previous_price > 0 and price > 0 else 0.0
+            for previous_price, price in zip(prices, prices[1:])
+        ]
+        return daily_returns[:len(prices)], log_returns[:len(prices)]
+
+    def assert_returns(series: CryptoSeries, daily_returns: list[float], log_returns: list[float]) -> None:
+        tester.assertEqual(derived_column(series, DerivedColumnName.DAILY_RETURN).tolist(), daily_returns)
+        for actual, expected in zip(derived_column(series, DerivedColumnName.LOG_RETURN), log_returns, strict=True):
+            tester.assertAlmostEqual(actual, expected, places=12)
+
+    for backend in available_compute_backends():
+        with using_compute_backend(backend):
+            for length in (0, 1, 2, 3, len(close_amounts)):
+                assert_returns(series_of(close_amounts[:length]), *expected_returns_of(close_amounts[:length]))
+
+            daily_returns, log_returns = expected_returns_of(close_amounts)
+            tester.assertEqual(daily_returns[:4], [0.0, 0.5, -1.0, 0.0])
+            tester.assertEqual(log_returns[:4], [0.0, math.log(1.5), 0.0, 0.0])
+
+            # The first record of a view is still relative to the previous record of the dataset.
+            series = series_of(close_amounts)
+            assert_returns(series[3:], daily_returns[3:], log_returns[3:])
+            assert_returns(series[7:9], daily_returns[7:9], log_returns[7:9])
+
+            # The records appended after a zero price.
+            growing_series = series_of(close_amounts[:3])
+            assert_returns(growing_series, daily_returns[:3], log_returns[:3])
+            growing_series.extend(series_of(close_amounts)[3:])
+            assert_returns(growing_series, daily_returns, log_returns)
+
+            prices = [float(price) for price in data.close_amount]
+            assert_returns(data, *expected_returns_of(prices))
+
+
+def test_compute_backend_parity(tester: TestCase, data: CryptoSeries) -> None:
+    for backend in available_compute_backends():
+        with using_compute_backend(backend):
+            # A copy of the data, so the indexes are built again by the backend.
+            copied_data = CryptoSeries.concatenate([data])
+
+            test_highest_price(tester, copied_data)
+            test_lowest_price(tester, copied_data)
+            test_max_volume(tester, copied_data)
+            test_best_avg_value(tester, copied_data)
+            test_moving_average(tester, copied_data)
+
+
+def run(data_: CryptoSeries) -> None:
     Tester(
         'part A',
         data_,
@@ -191,6 +437,12 @@ def run(data_: tuple[CryptoRecord]) -> None:
         test_max_volume,
         test_best_avg_value,
         test_moving_average,
+        test_query_many,
+        test_range_summary,
+        test_query_result_cache,
+        test_extended_indexes,
+        test_derived_returns,
+        test_compute_backend_parity,
     ).run()
 
 
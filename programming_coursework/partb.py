@@ -1,10 +1,18 @@
+import mmap
+import os
+import tempfile
 from collections.abc import Callable, Sequence
-from functools import wraps
+from dataclasses import astuple
+from datetime import datetime, timezone
+from functools import cache, wraps
+from typing import Any
 from unittest import TestCase
 
-from constants import DATA_SOURCE_LOCATION
-from csv_reader import CryptoCompareCsvDto
-from err import DateOutOfRangeError, StartDateAfterEndDateError
+from constants import DATA_SOURCE_LOCATION, DEFAULT_DATA_SOURCE_LOCATION
+from csv_cache import cache_file_path_of, load_crypto_series_with_cache
+from csv_reader import CryptoCompareCsvDto, CryptoCompareCsvTail, merge_csv_files
+from enums import CsvIssueKind, CsvParserMode, DuplicateTimePolicy, ValidationMode
+from err import DateOutOfRangeError, DuplicateTimeError, StartDateAfterEndDateError
 from model import CryptoRecord
 from parta import (
     highest_price as __highest_price,
@@ -13,43 +21,83 @@ from parta import (
     best_avg_price as __best_avg_price,
     moving_average as __moving_average,
 )
+from series import CryptoSeries, ValidatedCryptoSeries, as_crypto_series, validate_crypto_series
 from tester import Tester
-from utils import redirect_to_main, date_str_to_utc_number
+from utils import (
+    redirect_to_main,
+    date_str_to_utc_number,
+    date_strs_to_utc_numbers,
+    utc_number_to_date_str,
+    utc_numbers_to_date_strs,
+    using_validation_mode,
+)
+
+
+def __cleaned_data_of(data_: Sequence) -> CryptoSeries:
+    if data_ is None or (isinstance(data_, Sequence) and len(data_) == 0):
+        # FIXME: raising FileNotFoundError is not make sense,
+        #   as we can't determine whether the file is not found by the length of data_.
+        #   However, we expect this error should be raised at this moment for coursework.
+        raise FileNotFoundError('dataset not found')
+
+    tmp_dto = CryptoCompareCsvDto(
+        'nothing, just for data checking.'
+        'We expect data has already read and saved as `data_`.'
+    )
+
+    # FIXME: This is a hacky way to validate the data type of data_,
+    #   as we expect the data_ may be a `Sequence[dict[str, str], ...]`.
+    # In coursework, we expect to check if some of the columns are missing "When we need them",
+    # However, this may not be a good idea in real world.
+    # So we delegate the responsibility to the dto, and let it raise the error.
+    cleaned_data = as_crypto_series(data_)
+    if cleaned_data is None:
+        # noinspection PyTypeChecker
+        cleaned_data = tmp_dto.to_crypto_series(data_)
+
+    return cleaned_data
+
+
+def validate_data_set(data_: Any) -> ValidatedCryptoSeries:
+    """
+    Check the data once, so the functions of this module recognize it without checking it again on every call.
+    This is worth it when many queries are made on the same large dataset.
+
+    Args:
+        data_: the data from a data_source file, in any form accepted by the functions of this module
+
+    Returns:
+        the checked data, sorted by the time, with its bounds
+
+    Raises:
+        FileNotFoundError: if the data is empty
+        KeyError: if any column is missing from the data
+    """
+    if isinstance(data_, ValidatedCryptoSeries):
+        return data_
+
+    return validate_crypto_series(__cleaned_data_of(data_))
 
 
 def data_validatable(func: Callable[[Sequence, str, str], float]) -> Callable[[Sequence, str, str], float]:
     @wraps(func)
-    def __validate_dates_range(data: tuple[CryptoRecord], *date_strs: str) -> None:
-        earliest_time = data[0].the_time
-        latest_time = data[-1].the_time
-
+    def __validate_dates_range(earliest_time: int, latest_time: int, *date_strs: str) -> None:
         for date_str in date_strs:
             date_utc = date_str_to_utc_number(date_str)
             if not (earliest_time <= date_utc <= latest_time):
                 raise DateOutOfRangeError()
 
     @wraps(func)
-    def __with_validated_data(data_: Sequence, start_date: str, end_date: str) -> float:
-        if data_ is None or (isinstance(data_, Sequence) and len(data_) == 0):
-            # FIXME: raising FileNotFoundError is not make sense,
-            #   as we can't determine whether the file is not found by the length of data_.
-            #   However, we expect this error should be raised at this moment for coursework.
-            raise FileNotFoundError('dataset not found')
-
-        tmp_dto = CryptoCompareCsvDto(
-            'nothing, just for data checking.'
-            'We expect data has already read and saved as `data_`.'
-        )
+    def __with_validated_data(data_: Sequence | ValidatedCryptoSeries, start_date: str, end_date: str) -> float:
+        # The data checked by `validate_data_set` is recognized at once, only the dates are checked.
+        if isinstance(data_, ValidatedCryptoSeries):
+            __validate_dates_range(data_.earliest_time, data_.latest_time, start_date, end_date)
+            return func(data_.series, start_date, end_date)
 
-        # FIXME: This is a hacky way to validate the data type of data_,
-        #   as we expect the data_ may be a `Sequence[dict[str, str], ...]`.
-        # In coursework, we expect to check if some of the columns are missing "When we need them",
-        # However, this may not be a good idea in real world.
-        # So we delegate the responsibility to the dto, and let it raise the error.
-        # noinspection PyTypeChecker
-        cleaned_data = tmp_dto.to_crypto_records(data_) if not isinstance(data_[0], CryptoRecord) else data_
+        cleaned_data = __cleaned_data_of(data_)
+        times = cleaned_data.the_time
 
-        __validate_dates_range(cleaned_data, start_date, end_date)
+        __validate_dates_range(times[0], times[-1], start_date, end_date)
 
         return func(cleaned_data, start_date, end_date)
 
@@ -57,30 +105,49 @@ def data_validatable(func: Callable[[Sequence, str, str], float]) -> Callable[[S
 
 
 @data_validatable
-def highest_price(data: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+def highest_price(data: CryptoSeries, start_date: str, end_date: str) -> float:
     return __highest_price(data, start_date, end_date)
 
 
 @data_validatable
-def lowest_price(data: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+def lowest_price(data: CryptoSeries, start_date: str, end_date: str) -> float:
     return __lowest_price(data, start_date, end_date)
 
 
 @data_validatable
-def max_volume(data: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+def max_volume(data: CryptoSeries, start_date: str, end_date: str) -> float:
     return __max_volume(data, start_date, end_date)
 
 
 @data_validatable
-def best_avg_price(data: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+def best_avg_price(data: CryptoSeries, start_date: str, end_date: str) -> float:
     return __best_avg_price(data, start_date, end_date)
 
 
 @data_validatable
-def moving_average(data: tuple[CryptoRecord], start_date: str, end_date: str) -> float:
+def moving_average(data: CryptoSeries, start_date: str, end_date: str) -> float:
     return __moving_average(data, start_date, end_date)
 
 
+@cache
+def __default_csv_lines() -> tuple[str, list[str]]:
+    """
+    The header and the rows of the default dataset, to write the csv files used by the tests.
+    """
+    with open(DEFAULT_DATA_SOURCE_LOCATION, mode='r', encoding='utf-8-sig') as file:
+        header, *lines = file.read().splitlines()
+
+    return header, lines
+
+
+def __write_csv(path: str, rows: list[str], mode: str = 'w') -> None:
+    # The header is written first unless appending to the file.
+    header, _ = __default_csv_lines()
+
+    with open(path, mode=mode, encoding='utf-8') as file:
+        file.writelines(f"{row}\n" for row in ([header] if mode == 'w' else []) + rows)
+
+
 def test_csv_not_exists(tester: TestCase, _) -> None:
     given_fake_csv_file = 'fake.csv'
 
@@ -99,12 +166,494 @@ def test_non_existent_csv_column(tester: TestCase, _) -> None:
         use_crypto_data_set_from(given_problem_csv_file)
 
 
+def test_csv_validation_report(tester: TestCase, _) -> None:
+    report = CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION).validation_report()
+    tester.assertTrue(report.is_valid)
+
+    given_problem_csv_file = f"{DATA_SOURCE_LOCATION}/cryptocompare_btc_insufficient_column.csv"
+    report = CryptoCompareCsvDto(given_problem_csv_file).validation_report()
+
+    tester.assertEqual(report.issue_counts, {CsvIssueKind.MISSING_COLUMN.value: 1})
+    tester.assertEqual(report.issues[0].column, CryptoCompareCsvDto.TIME_COL_NAME)
+
+    malformed_rows = (
+        'time,high,low,open,close,volumefrom,volumeto',
+        '86400,1,1,1,1,10,10',
+        '172800,1,1,1,1,10,10',
+        '259200,1,1,1,1,10,10',
+        '259200,1,1,1,1,10,10',
+        '86400,1,1,1,1,10,10',
+        '345600,1,1,1,1,10,10',
+        '604800,1,1,1,1,10,10',
+        '691200,oops,1,1,1,10,10',
+        '777600,1,1',
+        '864000,1,1,1,1,0,10',
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        malformed_csv_file = os.path.join(directory, 'malformed.csv')
+        with open(malformed_csv_file, mode='w', encoding='utf-8') as file:
+            file.writelines(f"{row}\n" for row in malformed_rows)
+
+        # The chunks are small, so the time is also checked across the chunks.
+        report = CryptoCompareCsvDto(malformed_csv_file).validation_report(chunk_size=3)
+
+    tester.assertFalse(report.is_valid)
+    tester.assertEqual(report.row_count, len(malformed_rows) - 1)
+    tester.assertEqual(
+        [(issue.kind, issue.line_number, issue.column, issue.value) for issue in report.issues],
+        [
+            (CsvIssueKind.DUPLICATE_TIME.value, 5, CryptoCompareCsvDto.TIME_COL_NAME, '259200'),
+            (CsvIssueKind.OUT_OF_ORDER_TIME.value, 6, CryptoCompareCsvDto.TIME_COL_NAME, '86400'),
+            (CsvIssueKind.DATE_GAP.value, 8, CryptoCompareCsvDto.TIME_COL_NAME, '2 days missing before 604800'),
+            (CsvIssueKind.UNPARSABLE_CELL.value, 9, CryptoCompareCsvDto.HIGH_COL_NAME, 'oops'),
+            (CsvIssueKind.SHORT_ROW.value, 10, None, '777600,1,1'),
+            (CsvIssueKind.NON_POSITIVE_VOLUME.value, 11, CryptoCompareCsvDto.VOLUME_FROM_COL_NAME, '0.0'),
+            # The time of the short row is not checked.
+            (CsvIssueKind.DATE_GAP.value, 11, CryptoCompareCsvDto.TIME_COL_NAME, '1 days missing before 864000'),
+        ]
+    )
+
+
+def test_csv_chunks(tester: TestCase, _) -> None:
+    expected_records = CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION).to_crypto_series().to_records()
+    row_count = len(expected_records)
+
+    for parser_mode in CsvParserMode:
+        dto = CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION, parser_mode)
+
+        # One row per chunk, an exact divisor of the row count, a non-divisor, and larger than the file.
+        for chunk_size in (1, next(size for size in range(2, row_count) if row_count % size == 0), 7, row_count + 1):
+            chunks = list(dto.iter_series_chunks(chunk_size))
+            tester.assertEqual([len(chunk) for chunk in chunks[:-1]], [chunk_size] * (len(chunks) - 1))
+            tester.assertTrue(0 < len(chunks[-1]) <= chunk_size)
+            tester.assertEqual(len(chunks), -(-row_count // chunk_size))
+
+            # The file is already sorted by the time, so the chunks in file order are the same as the full load.
+            tester.assertEqual(CryptoSeries.concatenate(chunks).to_records(), expected_records)
+            tester.assertEqual(tuple(dto.iter_records(chunk_size)), expected_records)
+
+        with tester.assertRaises(ValueError):
+            next(dto.iter_series_chunks(0))
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, 'empty.csv')
+        __write_csv(csv_file_path, [])
+
+        for parser_mode in CsvParserMode:
+            tester.assertEqual(list(CryptoCompareCsvDto(csv_file_path, parser_mode).iter_series_chunks(3)), [])
+
+
+def test_duplicate_times(tester: TestCase, _) -> None:
+    _, lines = __default_csv_lines()
+
+    def records_of(path: str, policy: DuplicateTimePolicy = DuplicateTimePolicy.KEEP) -> tuple:
+        return CryptoCompareCsvDto(path, duplicate_time_policy=policy).to_crypto_series().to_records()
+
+    def is_sorted_by_time(records: Sequence) -> bool:
+        return all(former.the_time <= latter.the_time for former, latter in zip(records, records[1:]))
+
+    def with_time_of(line: str, other_line: str) -> str:
+        # Another row, but sharing the time of `other_line`.
+        return ','.join([other_line.split(',', 1)[0], line.split(',', 1)[1]])
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"{name}.csv") for name in ('first', 'second', 'third', 'fourth')]
+        first_path, second_path, third_path, fourth_path = paths
+
+        # The 6th row shares the time of the 3rd one, and the rows are out of order.
+        duplicated_lines = lines[:5] + [with_time_of(lines[10], lines[2])] + lines[5:10]
+        __write_csv(first_path, duplicated_lines[::-1])
+        sorted_records = records_of(first_path)
+        first_records = records_of(first_path, DuplicateTimePolicy.FIRST)
+        last_records = records_of(first_path, DuplicateTimePolicy.LAST)
+
+        tester.assertEqual(len(sorted_records), 11)
+        tester.assertTrue(is_sorted_by_time(sorted_records))
+        # The file is reversed, so the duplicated row is read before the original 3rd row.
+        tester.assertEqual(len(first_records), 10)
+        tester.assertEqual(len(last_records), 10)
+        tester.assertEqual(first_records[2].high, float(lines[10].split(',')[1]))
+        tester.assertEqual(last_records[2].high, float(lines[2].split(',')[1]))
+        tester.assertEqual(first_records[:2] + first_records[3:], last_records[:2] + last_records[3:])
+
+        with tester.assertRaises(DuplicateTimeError):
+            CryptoCompareCsvDto(first_path, duplicate_time_policy=DuplicateTimePolicy.ERROR).to_crypto_series()
+
+        __write_csv(second_path, lines[:10])
+        tester.assertEqual(records_of(second_path, DuplicateTimePolicy.ERROR), records_of(second_path))
+
+        # Disjoint files, given out of order.
+        __write_csv(second_path, lines[20:30])
+        __write_csv(third_path, lines[10:20])
+        tester.assertEqual(
+            merge_csv_files([second_path, third_path], duplicate_time_policy=DuplicateTimePolicy.ERROR).to_records(),
+            records_of(third_path) + records_of(second_path)
+        )
+
+        # Overlapping files, the rows of the 10th to the 15th are in both of them.
+        __write_csv(second_path, lines[:15])
+        __write_csv(third_path, lines[10:25][::-1])
+        __write_csv(fourth_path, lines[:25])
+        merged = merge_csv_files([second_path, third_path])
+        tester.assertEqual(len(merged), 30)
+        tester.assertTrue(is_sorted_by_time(merged))
+
+        for policy in (DuplicateTimePolicy.FIRST, DuplicateTimePolicy.LAST):
+            tester.assertEqual(
+                merge_csv_files([second_path, third_path], duplicate_time_policy=policy).to_records(),
+                records_of(fourth_path)
+            )
+
+        with tester.assertRaises(DuplicateTimeError):
+            merge_csv_files([second_path, third_path], duplicate_time_policy=DuplicateTimePolicy.ERROR)
+
+        # The position of the file breaks the ties of the time.
+        __write_csv(third_path, [with_time_of(lines[30], lines[12])])
+        for policy, expected_high in (
+                (DuplicateTimePolicy.FIRST, float(lines[12].split(',')[1])),
+                (DuplicateTimePolicy.LAST, float(lines[30].split(',')[1])),
+        ):
+            merged = merge_csv_files([second_path, third_path], duplicate_time_policy=policy)
+            tester.assertEqual(len(merged), 15)
+            tester.assertEqual(merged[12].high, expected_high)
+
+
+def test_data_set_from_many(tester: TestCase, _) -> None:
+    _, lines = __default_csv_lines()
+
+    from context import use_crypto_data_set_from_many
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The first two files overlap, the last one is disjoint from them, and they are given out of order.
+        csv_file_paths = []
+        for name, rows in (('last', lines[1300:]), ('first', lines[:700]), ('middle', lines[600:1300])):
+            csv_file_paths.append(csv_file_path := os.path.join(directory, f"{name}.csv"))
+            __write_csv(csv_file_path, rows)
+
+        for policy in DuplicateTimePolicy:
+            if policy is DuplicateTimePolicy.ERROR:
+                for workers in (1, 2):
+                    with tester.assertRaises(DuplicateTimeError):
+                        use_crypto_data_set_from_many(csv_file_paths, workers, duplicate_time_policy=policy)
+                continue
+
+            expected_records = merge_csv_files(csv_file_paths, duplicate_time_policy=policy).to_records()
+
+            for use_cache in (False, True):
+                for workers in (1, 2):
+                    series = use_crypto_data_set_from_many(csv_file_paths, workers, use_cache, policy)
+                    tester.assertEqual(series.to_records(), expected_records)
+
+        full_series = CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION).to_crypto_series()
+        tester.assertEqual(
+            use_crypto_data_set_from_many(csv_file_paths[:2], workers=2).to_records(),
+            full_series[:700].to_records() + full_series[1300:].to_records()
+        )
+
+        with tester.assertRaises(FileNotFoundError):
+            use_crypto_data_set_from_many(csv_file_paths + [os.path.join(directory, 'missing.csv')], workers=2)
+
+
+def test_data_set_registry(tester: TestCase, _) -> None:
+    _, lines = __default_csv_lines()
+
+    from context import CryptoDataSetRegistry
+
+    loaded_paths: list[str] = []
+
+    def loader(path: str) -> CryptoSeries:
+        loaded_paths.append(path)
+        return CryptoCompareCsvDto(path).to_crypto_series()
+
+    def assert_stats(hits: int, misses: int, evictions: int, data_set_count: int) -> None:
+        stats = registry.stats
+        tester.assertEqual((stats.hits, stats.misses, stats.evictions), (hits, misses, evictions))
+        tester.assertEqual(stats.data_set_count, data_set_count)
+        tester.assertEqual(stats.nbytes, data_set_count * nbytes)
+
+    with tempfile.TemporaryDirectory() as directory:
+        first_path, second_path, third_path = (os.path.join(directory, f"{name}.csv") for name in 'abc')
+        for index, path in enumerate((first_path, second_path, third_path)):
+            __write_csv(path, lines[index * 100:(index + 1) * 100])
+
+        nbytes = CryptoCompareCsvDto(first_path).to_crypto_series().nbytes
+        registry = CryptoDataSetRegistry(memory_budget=2 * nbytes)
+
+        # Misses, then hits of the same frozen dataset.
+        first_series = registry.get(first_path, loader)
+        tester.assertTrue(first_series.is_frozen)
+        tester.assertEqual(first_series.to_records(), CryptoCompareCsvDto(first_path).to_crypto_series().to_records())
+        tester.assertIs(registry.get(first_path, loader), first_series)
+        tester.assertIs(registry.get(os.path.relpath(first_path), loader), first_series)
+        assert_stats(hits=2, misses=1, evictions=0, data_set_count=1)
+
+        # The least recently used one is evicted when the budget is exceeded.
+        registry.get(second_path, loader)
+        registry.get(first_path, loader)
+        registry.get(third_path, loader)
+        assert_stats(hits=3, misses=3, evictions=1, data_set_count=2)
+        registry.get(first_path, loader)
+        tester.assertEqual(loaded_paths, [first_path, second_path, third_path])
+        registry.get(second_path, loader)
+        assert_stats(hits=4, misses=4, evictions=2, data_set_count=2)
+
+        # A dataset larger than the budget is still kept, until the next one is registered.
+        registry.memory_budget = nbytes // 2
+        assert_stats(hits=4, misses=4, evictions=4, data_set_count=0)
+        registry.get(third_path, loader)
+        assert_stats(hits=4, misses=5, evictions=4, data_set_count=1)
+        registry.memory_budget = 3 * nbytes
+
+        # A changed file is read again, and the outdated dataset is dropped without being counted as an eviction.
+        registry.get(first_path, loader)
+        __write_csv(first_path, lines[500:650])
+        os.utime(first_path, ns=(0, 0))
+        changed_series = registry.get(first_path, loader)
+        tester.assertEqual(len(changed_series), 150)
+        tester.assertEqual(len(first_series), 100)
+        tester.assertIs(registry.get(first_path, loader), changed_series)
+        stats = registry.stats
+        tester.assertEqual((stats.hits, stats.misses, stats.evictions, stats.data_set_count), (5, 7, 4, 2))
+        tester.assertEqual(stats.nbytes, nbytes + changed_series.nbytes)
+
+        # The loader raises the error of a missing file, and nothing is registered.
+        with tester.assertRaises(FileNotFoundError):
+            registry.get(os.path.join(directory, 'missing.csv'), loader)
+        tester.assertEqual(registry.stats.data_set_count, 2)
+
+        registry.clear()
+        tester.assertEqual((registry.stats.data_set_count, registry.stats.nbytes), (0, 0))
+        tester.assertIsNot(registry.get(first_path, loader), changed_series)
+
+
+def test_csv_tail(tester: TestCase, _) -> None:
+    header, lines = __default_csv_lines()
+
+    def assert_in_sync(tail: CryptoCompareCsvTail, path: str) -> None:
+        tester.assertEqual(tail.series.to_records(), CryptoCompareCsvDto(path).to_crypto_series().to_records())
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, 'tail.csv')
+        __write_csv(csv_file_path, lines[:100])
+        tail = CryptoCompareCsvTail(csv_file_path)
+        series = tail.series
+        assert_in_sync(tail, csv_file_path)
+
+        # Appended, with a partially written row.
+        __write_csv(csv_file_path, lines[100:150], mode='a')
+        with open(csv_file_path, mode='a', encoding='utf-8') as file:
+            file.write(lines[150][:10])
+        tester.assertEqual(tail.refresh(), 50)
+        tester.assertIs(tail.series, series)
+        tester.assertEqual(len(series), 150)
+
+        with open(csv_file_path, mode='a', encoding='utf-8') as file:
+            file.write(f"{lines[150][10:]}\n")
+        tester.assertEqual(tail.refresh(), 1)
+        assert_in_sync(tail, csv_file_path)
+
+        # Truncated.
+        __write_csv(csv_file_path, lines[:20])
+        tester.assertEqual(tail.refresh(), 20)
+        assert_in_sync(tail, csv_file_path)
+
+        # Rewritten in place with a larger file of other rows.
+        __write_csv(csv_file_path, lines[500:900])
+        tester.assertEqual(tail.refresh(), 400)
+        assert_in_sync(tail, csv_file_path)
+
+        # Replaced by another larger file.
+        replacement_path = os.path.join(directory, 'replacement.csv')
+        __write_csv(replacement_path, lines[1000:1500])
+        os.replace(replacement_path, csv_file_path)
+        tester.assertEqual(tail.refresh(), 500)
+        assert_in_sync(tail, csv_file_path)
+        tester.assertEqual(tail.refresh(), 0)
+
+        # Appended while a column is exported, nothing is changed until the column is released.
+        series = tail.series
+        records = series.to_records()
+        high = series.high
+        __write_csv(csv_file_path, lines[1500:1510], mode='a')
+        for _ in range(2):
+            with tester.assertRaises(BufferError):
+                tail.refresh()
+            tester.assertEqual(series.to_records(), records)
+            with tester.assertRaises(BufferError):
+                series.extend(CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION).to_crypto_series()[1510:1520])
+            tester.assertEqual(series.to_records(), records)
+        high.release()
+        tester.assertEqual(tail.refresh(), 10)
+        tester.assertIs(tail.series, series)
+        assert_in_sync(tail, csv_file_path)
+
+        # The first line is the header even if it's blank, the same as reading the whole file.
+        with open(csv_file_path, mode='w', encoding='utf-8') as file:
+            file.write('\n\n')
+        tail = CryptoCompareCsvTail(csv_file_path)
+        tester.assertEqual((tail.refresh(), len(tail.series)), (0, 0))
+        assert_in_sync(tail, csv_file_path)
+        __write_csv(csv_file_path, [header] + lines[:5], mode='a')
+        with tester.assertRaises(KeyError):
+            tail.refresh()
+        with tester.assertRaises(KeyError):
+            CryptoCompareCsvDto(csv_file_path).to_crypto_series()
+
+
+def test_csv_cache(tester: TestCase, _) -> None:
+    _, lines = __default_csv_lines()
+
+    def is_loaded_from_cache(series: CryptoSeries) -> bool:
+        return isinstance(series.the_time.obj, mmap.mmap)
+
+    def assert_loaded(expected_lines: list[str], from_cache: bool) -> None:
+        series = load_crypto_series_with_cache(csv_file_path)
+        tester.assertEqual(is_loaded_from_cache(series), from_cache)
+        tester.assertEqual(series.to_records(), CryptoCompareCsvDto(csv_file_path).to_crypto_series().to_records())
+        tester.assertEqual(len(series), len(expected_lines))
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, 'cached.csv')
+        __write_csv(csv_file_path, lines[:100])
+
+        assert_loaded(lines[:100], from_cache=False)
+        tester.assertTrue(os.path.exists(cache_file_path_of(csv_file_path)))
+        assert_loaded(lines[:100], from_cache=True)
+
+        # The size is changed.
+        __write_csv(csv_file_path, lines[100:150], mode='a')
+        assert_loaded(lines[:150], from_cache=False)
+        assert_loaded(lines[:150], from_cache=True)
+
+        # Only the modification time is changed, while the size is the same.
+        csv_stat = os.stat(csv_file_path)
+        os.utime(csv_file_path, ns=(csv_stat.st_atime_ns, csv_stat.st_mtime_ns + 1_000_000_000))
+        assert_loaded(lines[:150], from_cache=False)
+        assert_loaded(lines[:150], from_cache=True)
+
+        # A broken cache file is rebuilt.
+        with open(cache_file_path_of(csv_file_path), mode='r+b') as file:
+            file.truncate(100)
+        assert_loaded(lines[:150], from_cache=False)
+        assert_loaded(lines[:150], from_cache=True)
+
+
+def test_validation_modes(tester: TestCase, data: CryptoSeries) -> None:
+    valid_fields = astuple(data[0])
+
+    def count_invalid_records_rejected(times: int) -> int:
+        rejected_count = 0
+        for _ in range(times):
+            try:
+                CryptoRecord(valid_fields[0], '1.0', *valid_fields[2:])
+            except TypeError:
+                rejected_count += 1
+        return rejected_count
+
+    tester.assertEqual(count_invalid_records_rejected(5), 5)
+
+    for mode, sample_interval, times, expected_count in (
+            (ValidationMode.FULL, 3, 12, 12),
+            (ValidationMode.SAMPLED, 1, 12, 12),
+            (ValidationMode.SAMPLED, 3, 12, 4),
+            (ValidationMode.SAMPLED, 7, 21, 3),
+            (ValidationMode.OFF, 3, 12, 0),
+            (ValidationMode.BULK, 3, 12, 0),
+    ):
+        with using_validation_mode(mode, sample_interval):
+            tester.assertEqual(count_invalid_records_rejected(times), expected_count, msg=(mode, sample_interval))
+
+            # `validate` is explicit, so it always checks.
+            with tester.assertRaises(TypeError):
+                CryptoRecord(valid_fields[0], '1.0', *valid_fields[2:]).validate()
+
+    with tester.assertRaises(ValueError):
+        with using_validation_mode(ValidationMode.SAMPLED, 0):
+            pass
+
+    # The bulk mode checks the format of the typed columns, and every value of the other columns.
+    columns = dict(zip(CryptoSeries.COLUMN_NAMES, data[:10].columns()))
+    CryptoRecord.validate_columns(columns)
+    CryptoRecord.validate_columns({name: column.tolist() for name, column in columns.items()})
+
+    for name, column in (
+            ('the_time', columns['high']),
+            ('high', columns['the_time']),
+            ('the_time', [float(the_time) for the_time in columns['the_time']]),
+            ('low', columns['low'].tolist()[:-1] + ['1.0']),
+    ):
+        with tester.assertRaises(TypeError, msg=name):
+            CryptoRecord.validate_columns(columns | {name: column})
+
+    with tester.assertRaises(ValueError):
+        CryptoRecord.validate_columns(columns | {'volume_to': columns['volume_to'][:-1]})
+
+    # All the modes read the same records.
+    expected_records = CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION).to_crypto_series().to_records()
+    for mode in ValidationMode:
+        tester.assertEqual(
+            CryptoCompareCsvDto(DEFAULT_DATA_SOURCE_LOCATION, validation_mode=mode).to_crypto_records(),
+            expected_records
+        )
+
+
 def test_invalid_date_string(tester: TestCase, _) -> None:
     with tester.assertRaises(ValueError):
         date_str_to_utc_number('01/00/2021')
 
 
-def test_date_out_of_range(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_date_conversions(tester: TestCase, _) -> None:
+    def reference_utc_number_of(date_str: str) -> int | None:
+        try:
+            return int(datetime.strptime(date_str, '%d/%m/%Y').replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            return None
+
+    given_date_strs = (
+        '01/01/1970', '31/12/1969', '28/04/2015', '1/1/2021', ' 1/1/2021', '01/1/2021',
+        '29/02/2000', '29/02/2020', '29/02/1900', '29/02/2019', '29/02/2100', '30/02/2020', '28/02/2019',
+        '31/04/2021', '31/12/2021', '00/01/2021', '32/01/2021', '01/00/2021', '01/13/2021',
+        '01/01/0000', '01/01/0001', '31/12/9999', '01/01/10000', '01/01/21', '01/01/-001',
+        '01-01-2021', '01/01/2021 ', ' 01/01/2021', '', '//', 'a/b/cdef', '０１/01/2021',
+    )
+
+    for date_str in given_date_strs:
+        if (expected_utc_number := reference_utc_number_of(date_str)) is None:
+            with tester.assertRaises(ValueError, msg=date_str):
+                date_str_to_utc_number(date_str)
+            with tester.assertRaises(ValueError, msg=date_str):
+                date_strs_to_utc_numbers(['01/01/2021', date_str])
+        else:
+            tester.assertEqual(date_str_to_utc_number(date_str), expected_utc_number, msg=date_str)
+
+    valid_date_strs = [date_str for date_str in given_date_strs if reference_utc_number_of(date_str) is not None]
+    tester.assertEqual(date_strs_to_utc_numbers(valid_date_strs), list(map(reference_utc_number_of, valid_date_strs)))
+    tester.assertEqual(date_strs_to_utc_numbers(iter(())), [])
+
+    # The times within a day, unordered times, and the earliest and the latest days supported.
+    min_utc_number = date_str_to_utc_number('01/01/0001')
+    max_utc_number = date_str_to_utc_number('31/12/9999')
+    given_utc_numbers = [
+        0, 1, 86399, 86400, -1, -86400, -86401, 1430179200, 1430179200.5, 1430265599, 951782400, 0,
+        min_utc_number, max_utc_number + 86399,
+    ]
+    expected_date_strs = [
+        datetime.fromtimestamp(utc_number, tz=timezone.utc).strftime('%d/%m/%Y') for utc_number in given_utc_numbers
+    ]
+    tester.assertEqual(list(map(utc_number_to_date_str, given_utc_numbers)), expected_date_strs)
+    tester.assertEqual(utc_numbers_to_date_strs(iter(given_utc_numbers)), expected_date_strs)
+    tester.assertEqual(utc_numbers_to_date_strs(()), [])
+    tester.assertEqual(utc_number_to_date_str(date_str_to_utc_number('29/02/2000')), '29/02/2000')
+
+    for utc_number in (min_utc_number - 1, max_utc_number + 86400):
+        with tester.assertRaises(ValueError):
+            utc_number_to_date_str(utc_number)
+        with tester.assertRaises(ValueError):
+            utc_numbers_to_date_strs([0, utc_number])
+
+
+def test_date_out_of_range(tester: TestCase, data: CryptoSeries) -> None:
     pass
     with tester.assertRaises(DateOutOfRangeError):
         highest_price(data, '01/01/2000', '01/01/2019')
@@ -132,7 +681,7 @@ def test_date_out_of_range(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         moving_average(data, '01/01/2015', '01/01/2099')
 
 
-def test_end_date_before_start_date(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_end_date_before_start_date(tester: TestCase, data: CryptoSeries) -> None:
     with tester.assertRaises(StartDateAfterEndDateError):
         highest_price(data, '02/01/2019', '01/01/2019')
 
@@ -149,15 +698,59 @@ def test_end_date_before_start_date(tester: TestCase, data: tuple[CryptoRecord])
         moving_average(data, '02/01/2019', '01/01/2019')
 
 
-def run(data_: tuple[CryptoRecord]) -> None:
+def test_sequence_of_records(tester: TestCase, data: CryptoSeries) -> None:
+    records = data.to_records()
+
+    for given_data in (records, list(records)):
+        tester.assertEqual(highest_price(given_data, '01/01/2016', '31/12/2016'), 982.57)
+        tester.assertEqual(
+            moving_average(given_data, '01/01/2016', '31/12/2016'),
+            moving_average(data, '01/01/2016', '31/12/2016')
+        )
+
+    # A tuple is converted only once, while a list may have been changed since the last time.
+    tester.assertIs(as_crypto_series(records), as_crypto_series(records))
+    tester.assertIsNot(as_crypto_series(list(records)), as_crypto_series(list(records)))
+    tester.assertIsNone(as_crypto_series('01/01/2016'))
+
+
+def test_validated_data_set(tester: TestCase, data: CryptoSeries) -> None:
+    validated_data = validate_data_set(data)
+
+    tester.assertIs(validate_data_set(validated_data), validated_data)
+    tester.assertEqual(
+        moving_average(validated_data, '01/01/2016', '31/12/2016'),
+        moving_average(data, '01/01/2016', '31/12/2016')
+    )
+
+    with tester.assertRaises(DateOutOfRangeError):
+        highest_price(validated_data, '01/01/2000', '01/01/2019')
+    with tester.assertRaises(StartDateAfterEndDateError):
+        highest_price(validated_data, '02/01/2019', '01/01/2019')
+    with tester.assertRaises(FileNotFoundError):
+        validate_data_set(())
+
+
+def run(data_: CryptoSeries) -> None:
     Tester(
         'part B',
         data_,
         test_csv_not_exists,
         test_non_existent_csv_column,
+        test_csv_validation_report,
+        test_csv_chunks,
+        test_duplicate_times,
+        test_data_set_from_many,
+        test_data_set_registry,
+        test_csv_tail,
+        test_csv_cache,
+        test_validation_modes,
         test_invalid_date_string,
+        test_date_conversions,
         test_date_out_of_range,
         test_end_date_before_start_date,
+        test_sequence_of_records,
+        test_validated_data_set,
     ).run()
 
 
@@ -1,16 +1,31 @@
-from collections.abc import Callable
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+from array import array
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
 from statistics import mean
+from typing import Any
 from unittest import TestCase
 
-from context import expect_illegal_data_type
-from model import CryptoRecord
+from compute_backend import available_compute_backends, numpy_or_none, numpy_to_array, using_compute_backend
+from constants import RUNTIME_DIR
+from context import expect_illegal_data_type, resolve_crypto_series, use_default_crypto_data_set
+from derived_columns import derived_column
+from enums import DerivedColumnName
+from model import MovingAverageTable
+from range_index import PrefixSums
+from series import CryptoSeries, TIME_TYPECODE, VALUE_TYPECODE
+from shared_series import attach_crypto_series, detach_crypto_series, publish_crypto_series
 from testdata.partc import strategy_test_data
 from tester import Tester, use_validated_date
 from utils import redirect_to_main, utc_number_to_date_str
 
 
 @expect_illegal_data_type
-def moving_avg_short(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> dict[int, float]:
+def moving_avg_short(data_: CryptoSeries, start_date: str, end_date: str) -> dict[int, float]:
     """
     Takes the dataset with the start and end dates,
     and it calculates the moving average with time window 3 for all the dates within the given range.
@@ -28,7 +43,7 @@ def moving_avg_short(data_: tuple[CryptoRecord], start_date: str, end_date: str)
 
 
 @expect_illegal_data_type
-def moving_avg_long(data_: tuple[CryptoRecord], start_date: str, end_date: str) -> dict[int, float]:
+def moving_avg_long(data_: CryptoSeries, start_date: str, end_date: str) -> dict[int, float]:
     """
     Takes the dataset with the start and end dates,
     and it calculates the moving average with time window 10 for all the dates within the given range.
@@ -45,6 +60,33 @@ def moving_avg_long(data_: tuple[CryptoRecord], start_date: str, end_date: str)
     return __moving_avg_with_scope(10, data_, start_date, end_date)
 
 
+def moving_averages(data_: Any, start_date: str, end_date: str, scopes: Iterable[int]) -> MovingAverageTable:
+    """
+    Takes the dataset with the start and end dates,
+    and it calculates the moving averages of all the given window sizes for all the dates within the given range,
+    in the same way as :func:`moving_avg_short` and :func:`moving_avg_long`.
+    The prices are summed up only once, then every average of every window size is
+    the difference of two prefix sums, so adding more window sizes costs almost nothing.
+
+    Args:
+        data_: the data from a data_source file, resolved by :func:`context.resolve_crypto_series`
+        start_date: string in "dd/mm/yyyy" format
+        end_date: string in "dd/mm/yyyy" format
+        scopes: the window sizes
+
+    Returns:
+        the dates within the given range, and the moving averages of each window size aligned to them
+    """
+    _scopes: tuple[int, ...] = tuple(sorted(set(scopes)))
+
+    if any(scope <= 0 for scope in _scopes):
+        raise ValueError('scope should greater than 0')
+
+    series = resolve_crypto_series(data_, __name__)
+
+    return __window_means_of(series, start_date, end_date, _scopes)
+
+
 # FIXME: This function named 'find...list' however it returns a dict. This is confusing.
 def find_buy_list(short_avg_dict: dict[int, float], long_avg_dict: dict[int, float]) -> dict[int, int]:
     """
@@ -107,7 +149,7 @@ def find_sell_list(short_avg_dict: dict[int, float], long_avg_dict: dict[int, fl
 
 @expect_illegal_data_type
 def crossover_method(
-        data_: tuple[CryptoRecord],
+        data_: CryptoSeries,
         start_date: str,
         end_date: str
 ) -> tuple[[str, ...], [str, ...]]:
@@ -176,7 +218,7 @@ def __find__strategy_decisions(
     return result
 
 
-def __moving_avg_with_scope(scope: int, data_: tuple[CryptoRecord], start_date: str, end_date: str) -> dict[int, float]:
+def __moving_avg_with_scope(scope: int, data_: CryptoSeries, start_date: str, end_date: str) -> dict[int, float]:
     """
     Calculates the moving average with the given scope.
 
@@ -189,57 +231,77 @@ def __moving_avg_with_scope(scope: int, data_: tuple[CryptoRecord], start_date:
     Returns:
         the moving average with the given scope for all the dates within the given range
     """
-    if scope < 0:
-        raise ValueError('scope should greater than or equal to 0')
+    if scope <= 0:
+        raise ValueError('scope should greater than 0')
 
-    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    return __window_means_of(data_, start_date, end_date, (scope,)).to_dict(scope)
 
-    # Find the first crypto record in the given date range.
-    # If nothing found, `first_record` will be `None`.
-    first_record = next(
-        scoped_records := (record for record in data_ if start_date_utc <= record.the_time <= end_date_utc),
-        None
-    )
 
-    # It indicates that there's no records in the given date range when `first_record` is `None`.
-    if first_record is None:
-        return {}
+def __window_means_of(
+        series: CryptoSeries,
+        start_date: str,
+        end_date: str,
+        scopes: tuple[int, ...],
+) -> MovingAverageTable:
+    """
+    The moving averages of the window sizes for all the dates within the given range,
+    shared by :func:`moving_avg_short`, :func:`moving_avg_long` and :func:`moving_averages`.
 
-    current_index: int = data_.index(first_record)
+    Every calculation requires a record and the previous (scope-1) records in the `series`.
+    The window size is expected to be `scope`, however, according to the requirement,
+    the window just starts from the head of the `series` when there are insufficient records.
+    The sum of every window is the difference of two prefix sums of the daily average prices.
 
-    # The reversed clone of `scoped_records`.
-    # For our purpose, every calculation requires a record and the previous (moving_avg_scope-1) records in the `data_`.
-    # Also, we want to avoid altering memory data by inserting items at the beginning of a list
-    # So here we creat a reverse, to let the previous records be added after the end of the list.
-    reversed_scoped_records: list[CryptoRecord | None] = list(scoped_records)[::-1]
+    Args:
+        series: the dataset
+        start_date: string in "dd/mm/yyyy" format
+        end_date: string in "dd/mm/yyyy" format
+        scopes: the window sizes, which are positive and sorted
 
-    # Perform the adding process
-    # Use `scope` instead of `scope - 1` if we need an extra record to
-    # calculate the average of the first record in the strategy list. (will be returned by this function)
-    reversed_scoped_records.append(first_record)  # Add the first record to the end of the list.
-    for _ in range(scope - 1):
-        current_index -= 1
-        # If we encountered the head of `data_`, use `None` to represents a non-existent record.
-        reversed_scoped_records.append(data_[current_index] if current_index >= 0 else None)
+    Returns:
+        the dates within the given range, and the moving averages of each window size aligned to them
+    """
+    start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
+    first_index, end_index = series.index_range(start_date_utc, end_date_utc)
 
-    result: dict[int, float] = {}
+    times = array(TIME_TYPECODE, series.the_time[first_index:end_index])
 
-    # Calculates the mean of each sliding window.
-    # The sliding window size is expected to `moving_avg_scope`, however, according to the requirement,
-    # We want to change the sliding window size when finding insufficient records.
-    for i, record in enumerate(reversed_scoped_records[:-scope + 1]):
-        slide_window_of_record = []
+    if len(times) == 0 or len(scopes) == 0:
+        return MovingAverageTable(times, {scope: array(VALUE_TYPECODE) for scope in scopes})
 
-        for window_index in range(scope):
-            if (window_item := reversed_scoped_records[i + window_index]) is not None:
-                slide_window_of_record.append(window_item.volume_to / window_item.volume_from)
+    # The longest window needs the most previous records, the others need a part of them.
+    head_index = max(first_index - scopes[-1] + 1, 0)
+    avg_prices = derived_column(series[head_index:end_index], DerivedColumnName.DAILY_AVERAGE_PRICE)
 
-        result[record.the_time] = mean(slide_window_of_record)
+    # The positions relative to `head_index` of the records in the given date range.
+    positions = range(first_index - head_index, end_index - head_index)
 
-    return result
+    if (np := numpy_or_none()) is not None:
+        cumulative_sums = np.concatenate(([0.0], np.cumsum(np.asarray(avg_prices))))
+        position_array = np.arange(positions.start, positions.stop)
+        averages: dict[int, array] = {}
 
+        for scope in scopes:
+            window_starts = np.maximum(position_array - scope + 1, 0)
+            averages[scope] = numpy_to_array(
+                (cumulative_sums[position_array + 1] - cumulative_sums[window_starts]) /
+                (position_array + 1 - window_starts)
+            )
+
+        return MovingAverageTable(times, averages)
+
+    prefix_sums = PrefixSums(avg_prices)
+
+    return MovingAverageTable(times, {
+        scope: array(VALUE_TYPECODE, (
+            prefix_sums.sum(max(position - scope + 1, 0), position + 1) / min(position + 1, scope)
+            for position in positions
+        ))
+        for scope in scopes
+    })
 
-def test_cross_over(tester: TestCase, data_: tuple[CryptoRecord]) -> None:
+
+def test_cross_over(tester: TestCase, data_: CryptoSeries) -> None:
     for strategy in strategy_test_data:
         tester.assertEqual(
             crossover_method(
@@ -254,11 +316,170 @@ def test_cross_over(tester: TestCase, data_: tuple[CryptoRecord]) -> None:
         )
 
 
-def run(data_: tuple[CryptoRecord]) -> None:
+def test_moving_averages(tester: TestCase, data_: CryptoSeries) -> None:
+    for backend in available_compute_backends():
+        with using_compute_backend(backend):
+            for strategy in strategy_test_data:
+                table = moving_averages(data_, strategy['start_date'], strategy['end_date'], (3, 10, 365))
+
+                tester.assertEqual(
+                    [
+                        utc_number_to_date_str(date)
+                        for date, decision in find_buy_list(table.to_dict(3), table.to_dict(10)).items()
+                        if decision == 1
+                    ],
+                    strategy['buy_list']
+                )
+
+                # The windows are shrunk at the head of the dataset.
+                avg_prices = derived_column(data_, DerivedColumnName.DAILY_AVERAGE_PRICE)
+                for scope, averages in (
+                        (3, table.to_dict(3)),
+                        (10, table.to_dict(10)),
+                        (365, table.to_dict(365)),
+                        (3, moving_avg_short(data_, strategy['start_date'], strategy['end_date'])),
+                        (10, moving_avg_long(data_, strategy['start_date'], strategy['end_date'])),
+                ):
+                    tester.assertEqual(list(averages), list(table.the_time))
+                    for date, average in averages.items():
+                        position = data_.index_range(date, date)[0]
+                        expected_average = mean(avg_prices[max(position - scope + 1, 0):position + 1])
+                        tester.assertAlmostEqual(average, expected_average, delta=abs(average) * 1e-12)
+
+
+def test_compute_backend_parity(tester: TestCase, data_: CryptoSeries) -> None:
+    for backend in available_compute_backends():
+        with using_compute_backend(backend):
+            test_cross_over(tester, data_)
+
+
+def __attached_record_count(shared_name: str) -> int:
+    return len(attach_crypto_series(shared_name))
+
+
+def test_shared_crypto_series(tester: TestCase, data_: CryptoSeries) -> None:
+    # An unrelated process, which has started a resource tracker of its own before attaching.
+    unrelated_process_script = (
+        "import sys\n"
+        f"sys.path.insert(0, {RUNTIME_DIR!r})\n"
+        "from multiprocessing.shared_memory import SharedMemory\n"
+        "own_shared_memory = SharedMemory(create=True, size=1)\n"
+        "from shared_series import attach_crypto_series\n"
+        "print(len(attach_crypto_series(sys.argv[1])))\n"
+        "own_shared_memory.close()\n"
+        "own_shared_memory.unlink()\n"
+    )
+
+    with publish_crypto_series(data_) as shared_series, tempfile.TemporaryDirectory() as directory:
+        tester.assertEqual(shared_series.series.to_records(), data_.to_records())
+
+        script_path = os.path.join(directory, 'attach.py')
+        with open(script_path, mode='w', encoding='utf-8') as file:
+            file.write(unrelated_process_script)
+
+        for _ in range(2):
+            completed_process = subprocess.run(
+                [sys.executable, script_path, shared_series.name],
+                capture_output=True, text=True, check=True
+            )
+            tester.assertEqual(int(completed_process.stdout), len(data_))
+
+        # The segment is still there for the workers, and the publisher can still destroy it.
+        for start_method in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context(start_method)) as executor:
+                tester.assertEqual(
+                    list(executor.map(__attached_record_count, [shared_series.name] * 2)),
+                    [len(data_)] * 2
+                )
+
+        tester.assertEqual(__attached_record_count(shared_series.name), len(data_))
+        detach_crypto_series(shared_series.name)
+
+
+def test_sweep_crossover_method(tester: TestCase, data_: CryptoSeries) -> None:
+    # Imported here, since the sweep is built on top of this module.
+    from crossover_sweep import sweep_crossover_method
+
+    window_pairs = [(3, 10), (5, 20), (10, 30)]
+    date_ranges = [(strategy['start_date'], strategy['end_date']) for strategy in strategy_test_data]
+    results = sweep_crossover_method(data_, window_pairs, date_ranges, workers=1)
+
+    # The workers attach to the dataset in shared memory, and give the same results.
+    tester.assertEqual(sweep_crossover_method(data_, window_pairs, date_ranges, workers=2), results)
+
+    tester.assertEqual(len(results), len(date_ranges) * 3)
+    tester.assertEqual(
+        [result.simulated_return for result in results],
+        sorted((result.simulated_return for result in results), reverse=True)
+    )
+
+    for strategy in strategy_test_data:
+        result, = (
+            result for result in results
+            if (result.short_scope, result.long_scope, result.start_date) == (3, 10, strategy['start_date'])
+        )
+        tester.assertEqual(list(result.buy_list), strategy['buy_list'])
+        tester.assertEqual(list(result.sell_list), strategy['sell_list'])
+
+
+def test_unusable_data(tester: TestCase, _) -> None:
+    # Imported here, since the sweep is built on top of this module.
+    from crossover_sweep import sweep_crossover_method
+    from parta import PartAMetric, highest_price, query_many
+
+    # The functions tell who calls them by the module of the calling frame,
+    # so each call is compiled into the code run as the calling module.
+    calls = {
+        'highest_price': 'highest_price(data, *date_range)',
+        'query_many': 'query_many(data, [PartAMetric.HIGHEST_PRICE], [date_range])[PartAMetric.HIGHEST_PRICE][0]',
+        'moving_averages': 'len(moving_averages(data, *date_range, (3, 10)).the_time)',
+        'sweep_crossover_method': 'sweep_crossover_method(data, [(3, 10)], [date_range], 1)[0].trade_count',
+    }
+
+    def namespace_of(module_name: str, data: Any) -> dict[str, Any]:
+        return {
+            '__name__': module_name,
+            'PartAMetric': PartAMetric,
+            'data': data,
+            'date_range': ('01/01/2018', '31/12/2018'),
+            'highest_price': highest_price,
+            'moving_averages': moving_averages,
+            'query_many': query_many,
+            'sweep_crossover_method': sweep_crossover_method,
+        }
+
+    def results_called_by(module_name: str, data: Any) -> dict[str, Any]:
+        namespace = namespace_of(module_name, data)
+        return {name: eval(call, namespace) for name, call in calls.items()}
+
+    default_results = results_called_by('partc', use_default_crypto_data_set())
+    tester.assertTrue(all(default_results.values()))
+
+    for data in ((), None, CryptoSeries.empty(), 'data.csv'):
+        # Any other module, e.g. a script, gets the default dataset.
+        tester.assertEqual(results_called_by('report', data), default_results)
+
+    # A friend context module gets the given data back, so an empty dataset gives empty results.
+    tester.assertEqual(
+        results_called_by('partc', ()),
+        {'highest_price': 0.0, 'query_many': 0.0, 'moving_averages': 0, 'sweep_crossover_method': 0}
+    )
+
+    for name, call in calls.items():
+        with tester.assertRaises(AttributeError, msg=name):
+            eval(call, namespace_of('partc', None))
+
+
+def run(data_: CryptoSeries) -> None:
     Tester(
         'part C',
         data_,
-        test_cross_over
+        test_cross_over,
+        test_moving_averages,
+        test_compute_backend_parity,
+        test_shared_crypto_series,
+        test_sweep_crossover_method,
+        test_unusable_data,
     ).run()
 
 
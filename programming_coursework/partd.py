@@ -3,7 +3,8 @@ from statistics import mean
 from typing import Final, TypeVar, final
 from unittest import TestCase
 
-from enums import MarketTrend
+from derived_columns import derived_column
+from enums import DerivedColumnName, MarketTrend
 from model import CryptoRecord
 from parta import (
     highest_price,
@@ -12,6 +13,8 @@ from parta import (
     moving_average,
     best_avg_price
 )
+from query_cache import memoize_investment_query
+from series import CryptoSeries, as_crypto_series
 from testdata.partd import next_average_test_data, market_trend_test_data
 from tester import use_validated_date, Tester
 from utils import redirect_to_main
@@ -21,18 +24,18 @@ _T = TypeVar('_T')
 
 
 class Investment:
-    __data: Final[tuple[CryptoRecord]]
+    __data: Final[CryptoSeries]
     __start_date: Final[str]
     __end_date: Final[str]
 
-    def __init__(self, data: tuple[CryptoRecord], start_date: str, end_date: str):
+    def __init__(self, data: CryptoSeries | tuple[CryptoRecord], start_date: str, end_date: str):
         self.__start_date = start_date
         self.__end_date = end_date
-        self.__data = data
+        self.__data = self.__either_or(as_crypto_series(data), data)
 
-    def __cut_data_slice_between(self, start_date: str, end_date: str) -> tuple[CryptoRecord]:
+    def __cut_data_slice_between(self, start_date: str, end_date: str) -> CryptoSeries:
         start_date_utc, end_date_utc = use_validated_date(start_date, end_date)
-        return tuple(record for record in self.__data if start_date_utc <= record.the_time <= end_date_utc)
+        return self.__data.between(start_date_utc, end_date_utc)
 
     # TODO: migrate this utility function to utils.py, and use python 3.12+ generic feature.
     @staticmethod
@@ -41,8 +44,8 @@ class Investment:
 
     def __calculate_data_in_period_by(
             self,
-            operation: Callable[[tuple[CryptoRecord], str, str], float],
-            data: tuple[CryptoRecord] | None = None,
+            operation: Callable[[CryptoSeries, str, str], float],
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None
     ) -> float:
@@ -61,13 +64,13 @@ class Investment:
         )
 
     @property
-    def data(self) -> tuple[CryptoRecord]:
+    def data(self) -> CryptoSeries:
         return self.__cut_data_slice_between(self.__start_date, self.__end_date)
 
     @final
     def highest_price(
             self,
-            data: tuple[CryptoRecord] | None = None,
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None,
     ) -> float:
@@ -81,7 +84,7 @@ class Investment:
     @final
     def lowest_price(
             self,
-            data: tuple[CryptoRecord] | None = None,
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None,
     ) -> float:
@@ -95,7 +98,7 @@ class Investment:
     @final
     def max_volume(
             self,
-            data: tuple[CryptoRecord] | None = None,
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None,
     ) -> float:
@@ -109,7 +112,7 @@ class Investment:
     @final
     def moving_average(
             self,
-            data: tuple[CryptoRecord] | None = None,
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None,
     ) -> float:
@@ -123,7 +126,7 @@ class Investment:
     @final
     def best_avg_price(
             self,
-            data: tuple[CryptoRecord] | None = None,
+            data: CryptoSeries | None = None,
             start_date: str | None = None,
             end_date: str | None = None,
     ) -> float:
@@ -135,6 +138,7 @@ class Investment:
         )
 
 
+@memoize_investment_query
 def predict_next_average(investment: Investment) -> float:
     """
     Predict the average price of the next day.
@@ -147,15 +151,16 @@ def predict_next_average(investment: Investment) -> float:
     """
     data = investment.data
     m, b = __calculate_regression_coefficients(
-        [record.the_time for record in data],
-        [record.volume_to / record.volume_from for record in data]
+        data.the_time,
+        derived_column(data, DerivedColumnName.DAILY_AVERAGE_PRICE)
     )
 
-    next_day = data[-1].the_time + 86400
+    next_day = data.the_time[-1] + 86400
 
     return m * next_day + b
 
 
+@memoize_investment_query
 def classify_trend(investment: Investment) -> str:
     """
     Performs a linear regression on the daily high and daily low for a given investment period,
@@ -179,15 +184,9 @@ def classify_trend(investment: Investment) -> str:
     """
     data = investment.data
 
-    trend_of_high, _ = __calculate_regression_coefficients(
-        [record.the_time for record in data],
-        [record.high for record in data]
-    )
+    trend_of_high, _ = __calculate_regression_coefficients(data.the_time, data.high)
 
-    trend_of_low, _ = __calculate_regression_coefficients(
-        [record.the_time for record in data],
-        [record.low for record in data]
-    )
+    trend_of_low, _ = __calculate_regression_coefficients(data.the_time, data.low)
 
     if trend_of_high > 0 > trend_of_low:
         return MarketTrend.VOLATILE.value
@@ -224,6 +223,7 @@ def __calculate_regression_coefficients(
     if xy_length == 0:
         raise ValueError('x_series and y_series must not be empty.')
 
+    # The exact means of `statistics` can not be reproduced bit for bit by NumPy, so this is never vectorized.
     mean_of_x = mean(x_series)
     mean_of_y = mean(y_series)
 
@@ -238,7 +238,7 @@ def __calculate_regression_coefficients(
     return m, mean_of_y - m * mean_of_x
 
 
-def test_predict_next_average(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_predict_next_average(tester: TestCase, data: CryptoSeries) -> None:
     for test in next_average_test_data:
         investment = Investment(data, test['start_date'], test['end_date'])
         tester.assertEqual(
@@ -247,7 +247,7 @@ def test_predict_next_average(tester: TestCase, data: tuple[CryptoRecord]) -> No
         )
 
 
-def test_classify_trend(tester: TestCase, data: tuple[CryptoRecord]) -> None:
+def test_classify_trend(tester: TestCase, data: CryptoSeries) -> None:
     for test in market_trend_test_data:
         investment = Investment(data, test['start_date'], test['end_date'])
         tester.assertEqual(
@@ -256,12 +256,12 @@ def test_classify_trend(tester: TestCase, data: tuple[CryptoRecord]) -> None:
         )
 
 
-def run(data_: tuple[CryptoRecord]) -> None:
+def run(data_: CryptoSeries) -> None:
     Tester(
         'part D',
         data_,
         test_predict_next_average,
-        test_classify_trend
+        test_classify_trend,
     ).run()
 
 
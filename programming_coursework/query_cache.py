@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from threading import Lock
+from typing import Any, Final, TypeVar
+
+from series import CryptoSeries
+from tester import use_validated_date
+from utils import JsonSerializable
+
+__all__ = [
+    "QueryCacheStats",
+    "QueryResultCache",
+    "memoize_investment_query",
+    "memoize_range_query",
+    "using_query_result_cache",
+]
+
+# TODO: migrate to 3.12 generic feature.
+_R = TypeVar('_R')
+
+# The default upper bound of the number of results kept by a cache.
+DEFAULT_QUERY_CACHE_MAX_SIZE: Final[int] = 4096
+
+_active_cache: Final[ContextVar['QueryResultCache | None']] = ContextVar('active_query_result_cache', default=None)
+
+
+class _StorageToken:
+    """
+    Identifies the records of a storage shared by a dataset and its views.
+    A new token is derived whenever the storage is extended, so the results cached before never match again.
+    """
+
+    __slots__ = ()
+
+
+@dataclass(frozen=True)
+class QueryCacheStats(JsonSerializable):
+    """
+    A snapshot of the counters of a :class:`QueryResultCache`.
+
+    Attributes:
+        hits: the number of queries served by a cached result
+        misses: the number of queries which had to be computed
+        evictions: the number of results dropped to stay within the max size
+        size: the number of results currently cached
+        max_size: the upper bound of `size`
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The ratio of the queries served by a cached result, 0 when there's no query yet.
+        """
+        queries = self.hits + self.misses
+        return self.hits / queries if queries > 0 else 0.0
+
+
+class QueryResultCache:
+    """
+    A bounded cache of the results of the queries over a date range of a dataset,
+    the least recently used results are evicted when it's full.
+
+    A result is keyed by the query, the identity of the records of the dataset and
+    the positions of the records in the range, so different date strings selecting the same records
+    share one result, and appending to the dataset invalidates every result of it.
+    """
+
+    __entries: Final[OrderedDict[Hashable, Any]]
+    __lock: Final[Lock]
+    __max_size: Final[int]
+    __hits: int
+    __misses: int
+    __evictions: int
+
+    def __init__(self, max_size: int = DEFAULT_QUERY_CACHE_MAX_SIZE) -> None:
+        if max_size <= 0:
+            raise ValueError('max_size should greater than 0')
+
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+        self.__max_size = max_size
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @property
+    def stats(self) -> QueryCacheStats:
+        with self.__lock:
+            return QueryCacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                size=len(self.__entries),
+                max_size=self.__max_size,
+            )
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], _R]) -> _R:
+        """
+        Get the cached result of the key, or compute and cache it.
+        """
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return self.__entries[key]
+
+            self.__misses += 1
+
+        # Do not hold the lock while computing, other queries can still be served meanwhile.
+        result = compute()
+
+        with self.__lock:
+            self.__entries[key] = result
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+        return result
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+
+@contextmanager
+def using_query_result_cache(cache: QueryResultCache | None = None) -> Iterator[QueryResultCache]:
+    """
+    Cache the results of the memoized queries (e.g. the functions of part A) called within the context.
+    The queries are never cached outside such a context.
+
+    :param cache: the cache to be used, a new one with the default max size is created when it is not given
+    :return: the cache, whose :attr:`QueryResultCache.stats` tells how well it works
+    """
+    _cache: Final[QueryResultCache] = cache if cache is not None else QueryResultCache()
+
+    token = _active_cache.set(_cache)
+    try:
+        yield _cache
+    finally:
+        _active_cache.reset(token)
+
+
+def _storage_token_of(series: CryptoSeries) -> _StorageToken:
+    return series.derive_from_storage(_StorageToken, lambda _: _StorageToken())
+
+
+def _key_of(func: Callable, series: CryptoSeries, start: int, stop: int) -> Hashable:
+    # The positions are in the storage, so the views of the same dataset share the results.
+    offset = series.storage_offset
+    return func.__module__, func.__qualname__, _storage_token_of(series), offset + start, offset + stop
+
+
+def memoize_range_query(func: Callable[[CryptoSeries, str, str], _R]) -> Callable[[Any, str, str], _R]:
+    """
+    Cache the results of a query over the records of a dataset between a start date and an end date,
+    when it's called within :func:`using_query_result_cache`.
+    The query must depend on nothing but those records.
+    """
+
+    @wraps(func)
+    def __memoized_func(data_: Any, start_date: str, end_date: str) -> _R:
+        cache = _active_cache.get()
+
+        if cache is None or not isinstance(data_, CryptoSeries):
+            return func(data_, start_date, end_date)
+
+        start, stop = data_.index_range(*use_validated_date(start_date, end_date))
+
+        return cache.get_or_compute(
+            _key_of(func, data_, start, stop),
+            lambda: func(data_, start_date, end_date)
+        )
+
+    return __memoized_func
+
+
+def memoize_investment_query(func: Callable[[Any], _R]) -> Callable[[Any], _R]:
+    """
+    Cache the results of a query over the data of an investment (e.g. :func:`partd.classify_trend`),
+    when it's called within :func:`using_query_result_cache`.
+    The query must depend on nothing but the records of the period of the investment.
+    """
+
+    @wraps(func)
+    def __memoized_func(investment: Any) -> _R:
+        cache = _active_cache.get()
+
+        if cache is None:
+            return func(investment)
+
+        data = investment.data
+
+        return cache.get_or_compute(
+            _key_of(func, data, 0, len(data)),
+            lambda: func(investment)
+        )
+
+    return __memoized_func
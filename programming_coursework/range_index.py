@@ -0,0 +1,286 @@
+import math
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from types import ModuleType
+from typing import Final
+
+from compute_backend import numpy_or_none, numpy_to_array
+from derived_columns import derived_column
+from enums import DerivedColumnName
+from series import CryptoSeries, VALUE_TYPECODE
+
+__all__ = [
+    "PrefixSums",
+    "SparseTable",
+    "max_between",
+    "mean_between",
+    "min_between",
+]
+
+# Only these columns are indexed, including all the derived columns.
+INDEXED_COLUMN_NAMES: Final[tuple[str, ...]] = ('high', 'low', 'volume_from', *DerivedColumnName.to_list())
+
+
+class SparseTable:
+    """
+    An index answering the max (or min) of any range of a column in O(1),
+    after building it in O(n log n) time and space.
+    Appending m values to the column costs O(m log n), as only the new entries of every level are computed.
+
+    The level `k` holds the extremum of every range of length `2 ** k`,
+    so any range is covered by two (possibly overlapping) ranges of the same level.
+    """
+
+    __levels: Final[list[array]]
+    __op: Final[Callable[[float, float], float]]
+
+    def __init__(self, values: Sequence[float], op: Callable[[float, float], float]) -> None:
+        """
+        Args:
+            values: the column to be indexed
+            op: `max` or `min`, any function picking one of two values works as well
+        """
+        self.__op = op
+        self.__levels = [array(VALUE_TYPECODE)]
+        self.extend(values)
+
+    def extend(self, values: Sequence[float]) -> None:
+        """
+        Append the values to the end of the indexed column.
+        The ranges already answered are not affected, so it's safe to be shared while extending.
+        """
+        levels = self.__levels
+        levels[0].extend(values)
+
+        np = numpy_or_none() if self.__op in (max, min) else None
+
+        # The level `k` is computed from the level `k - 1`, whose ranges are half as long.
+        k, width = 1, 1
+        while width * 2 <= len(levels[0]):
+            if k == len(levels):
+                levels.append(array(VALUE_TYPECODE))
+
+            previous, level = levels[k - 1], levels[k]
+            start, count = len(level), len(previous) - width
+
+            if np is not None:
+                level.extend(self.__extrema_by_numpy(np, previous, start, count, width))
+            else:
+                level.extend(map(self.__op, previous[start:count], previous[start + width:count + width]))
+
+            k, width = k + 1, width * 2
+
+    def __extrema_by_numpy(self, np: ModuleType, previous: array, start: int, count: int, width: int) -> array:
+        ufunc = np.maximum if self.__op is max else np.minimum
+        return numpy_to_array(ufunc(
+            np.asarray(previous[start:count], dtype=np.float64),
+            np.asarray(previous[start + width:count + width], dtype=np.float64)
+        ))
+
+    def __len__(self) -> int:
+        return len(self.__levels[0])
+
+    def query(self, start: int, stop: int) -> float | None:
+        """
+        Args:
+            start: the first position of the range
+            stop: the position after the last one of the range
+
+        Returns:
+            the extremum of the range, or `None` when the range is empty
+        """
+        if start >= stop:
+            return None
+
+        if start < 0 or stop > len(self):
+            raise IndexError(f"range [{start}, {stop}) out of the index of length {len(self)}.")
+
+        level = (stop - start).bit_length() - 1
+        values = self.__levels[level]
+
+        return self.__op(values[start], values[stop - (1 << level)])
+
+
+class PrefixSums:
+    """
+    An index answering the sum (or the mean) of any range of a column in O(1),
+    after building it in O(n) time and space. Appending m values to the column costs O(m).
+
+    The prefix sums are accumulated with the Neumaier compensated summation,
+    and the lost low-order parts are kept in a second column,
+    so the sum of a range is still accurate when the prefix sums become much larger than the range itself.
+    """
+
+    __sums: Final[array]
+    __compensations: Final[array]
+
+    def __init__(self, values: Iterable[float]) -> None:
+        self.__sums = array(VALUE_TYPECODE, [0.0])
+        self.__compensations = array(VALUE_TYPECODE, [0.0])
+        self.extend(values)
+
+    def extend(self, values: Iterable[float]) -> None:
+        """
+        Append the values to the end of the indexed column, the sums are continued exactly as if
+        the index was built from all the values at once.
+        """
+        total, compensation = self.__sums[-1], self.__compensations[-1]
+
+        for value in values:
+            next_total = total + value
+            if abs(total) >= abs(value):
+                compensation += (total - next_total) + value
+            else:
+                compensation += (value - next_total) + total
+            total = next_total
+
+            self.__sums.append(total)
+            self.__compensations.append(compensation)
+
+    def __len__(self) -> int:
+        return len(self.__sums) - 1
+
+    def sum(self, start: int, stop: int) -> float:
+        """
+        Args:
+            start: the first position of the range
+            stop: the position after the last one of the range
+
+        Returns:
+            the sum of the range, 0 when the range is empty
+        """
+        if start >= stop:
+            return 0.0
+
+        if start < 0 or stop > len(self):
+            raise IndexError(f"range [{start}, {stop}) out of the index of length {len(self)}.")
+
+        sums, compensations = self.__sums, self.__compensations
+
+        # `fsum` adds the four parts without any further rounding error.
+        return math.fsum((sums[stop], -sums[start], compensations[stop], -compensations[start]))
+
+    def mean(self, start: int, stop: int) -> float | None:
+        """
+        Returns:
+            the mean of the range, or `None` when the range is empty
+        """
+        if start >= stop:
+            return None
+
+        return self.sum(start, stop) / (stop - start)
+
+
+def __values_of(series: CryptoSeries, column_name: str) -> Sequence[float]:
+    if DerivedColumnName.is_valid(column_name):
+        return derived_column(series, column_name)
+    return series.column(column_name)
+
+
+def __sparse_table_of(
+        series: CryptoSeries,
+        column_name: str | DerivedColumnName,
+        op: Callable[[float, float], float],
+) -> SparseTable:
+    column_name = str(column_name)
+
+    if column_name not in INDEXED_COLUMN_NAMES:
+        raise KeyError(f"column {column_name} is not indexed. Only {', '.join(INDEXED_COLUMN_NAMES)}")
+
+    def extend_table(storage: CryptoSeries, table: SparseTable, length: int) -> SparseTable:
+        table.extend(__values_of(storage, column_name)[length:])
+        return table
+
+    # Built over the whole storage, so it's shared by every view of the dataset,
+    # and only the appended records are indexed after the dataset is extended.
+    return series.derive_from_storage(
+        (SparseTable, column_name, op),
+        lambda storage: SparseTable(__values_of(storage, column_name), op),
+        extend_table
+    )
+
+
+def __extremum_between(
+        series: CryptoSeries,
+        column_name: str | DerivedColumnName,
+        start_utc: int,
+        end_utc: int,
+        op: Callable[[float, float], float],
+) -> float | None:
+    start, stop = series.index_range(start_utc, end_utc)
+    offset = series.storage_offset
+
+    return __sparse_table_of(series, column_name, op).query(offset + start, offset + stop)
+
+
+def max_between(
+        series: CryptoSeries,
+        column_name: str | DerivedColumnName,
+        start_utc: int,
+        end_utc: int,
+) -> float | None:
+    """
+    The max value of the column between the given times (both inclusive),
+    answered by an index built lazily at the first query of the dataset.
+
+    Args:
+        series: the dataset
+        column_name: one of `high`, `low`, `volume_from` and the names of :class:`DerivedColumnName`
+        start_utc: the start time in UTC timestamp
+        end_utc: the end time in UTC timestamp
+
+    Returns:
+        the max value, or `None` when there's no record in the range
+
+    Raises:
+        KeyError: if the column is not indexed
+    """
+    return __extremum_between(series, column_name, start_utc, end_utc, max)
+
+
+def min_between(
+        series: CryptoSeries,
+        column_name: str | DerivedColumnName,
+        start_utc: int,
+        end_utc: int,
+) -> float | None:
+    """
+    The min value of the column between the given times (both inclusive), see :func:`max_between`.
+    """
+    return __extremum_between(series, column_name, start_utc, end_utc, min)
+
+
+def __prefix_sums_of(series: CryptoSeries, column_name: str | DerivedColumnName) -> PrefixSums:
+    column_name = str(column_name)
+
+    if column_name not in INDEXED_COLUMN_NAMES:
+        raise KeyError(f"column {column_name} is not indexed. Only {', '.join(INDEXED_COLUMN_NAMES)}")
+
+    def extend_prefix_sums(storage: CryptoSeries, prefix_sums: PrefixSums, length: int) -> PrefixSums:
+        prefix_sums.extend(__values_of(storage, column_name)[length:])
+        return prefix_sums
+
+    return series.derive_from_storage(
+        (PrefixSums, column_name),
+        lambda storage: PrefixSums(__values_of(storage, column_name)),
+        extend_prefix_sums
+    )
+
+
+def mean_between(
+        series: CryptoSeries,
+        column_name: str | DerivedColumnName,
+        start_utc: int,
+        end_utc: int,
+) -> float | None:
+    """
+    The mean value of the column between the given times (both inclusive),
+    answered by the prefix sums built lazily at the first query of the dataset, see :func:`max_between`.
+
+    Returns:
+        the mean value, or `None` when there's no record in the range
+    """
+    start, stop = series.index_range(start_utc, end_utc)
+    offset = series.storage_offset
+
+    return __prefix_sums_of(series, column_name).mean(offset + start, offset + stop)
@@ -0,0 +1,707 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from heapq import merge
+from itertools import pairwise, repeat
+from operator import attrgetter
+from threading import Lock
+from typing import Any, Final, TypeVar, overload
+
+from enums import DuplicateTimePolicy
+from err import DuplicateTimeError
+from model import CryptoRecord
+
+__all__ = [
+    "CryptoSeries",
+    "ValidatedCryptoSeries",
+    "as_crypto_series",
+    "positions_of_unique_times",
+    "validate_crypto_series",
+]
+
+# The typecodes of the columns, `q` is a signed 64-bit integer and `d` is a C double.
+TIME_TYPECODE: Final[str] = 'q'
+VALUE_TYPECODE: Final[str] = 'd'
+
+# TODO: migrate to 3.12 generic feature.
+_T = TypeVar('_T')
+
+# magic, format version, byte order, number of records, followed by the metadata of the owner of the buffer,
+# see `CryptoSeries.packed_with_header`.
+_PACKED_HEADER: Final[struct.Struct] = struct.Struct('<8sIIq')
+_NATIVE_BYTE_ORDER: Final[int] = 1 if sys.byteorder == 'little' else 2
+
+# The packed columns start at a 64 bytes boundary, so every item of the columns is aligned.
+PACKED_COLUMNS_OFFSET: Final[int] = 64
+PACKED_METADATA_SIZE: Final[int] = PACKED_COLUMNS_OFFSET - _PACKED_HEADER.size
+
+# The number of the most recent tuples of records whose converted series are kept, see `as_crypto_series`.
+CONVERTED_TUPLE_CACHE_SIZE: Final[int] = 8
+
+# Keyed by the id of the tuple, and the tuple is kept with its series, so the id is never reused meanwhile.
+_converted_tuples: Final[OrderedDict[int, tuple[tuple[CryptoRecord, ...], 'CryptoSeries']]] = OrderedDict()
+_converted_tuples_lock: Final[Lock] = Lock()
+
+# Any object exporting a contiguous buffer with the expected typecode, e.g. `array` or a casted `memoryview`.
+Column = array | memoryview
+
+
+class CryptoSeries(Sequence[CryptoRecord]):
+    """
+    A time-sorted, column-oriented collection of cryptocurrency records.
+
+    Instead of holding a tuple of :class:`CryptoRecord`, every attribute of the records is stored
+    in its own contiguous column (`array('q')` for the time, `array('d')` for the others).
+    Slicing a series never copies the columns, and a :class:`CryptoRecord` is only materialized
+    when a single item is accessed or the series is iterated.
+
+    Attributes:
+        COLUMN_NAMES: the names of the columns, which are the same as the fields of :class:`CryptoRecord`
+        COLUMN_TYPECODES: the typecodes of the columns, in the same order as :attr:`COLUMN_NAMES`
+    """
+
+    COLUMN_NAMES: Final[tuple[str, ...]] = (
+        'the_time',
+        'high',
+        'low',
+        'open_amount',
+        'close_amount',
+        'volume_from',
+        'volume_to',
+    )
+    COLUMN_TYPECODES: Final[tuple[str, ...]] = (TIME_TYPECODE, *(VALUE_TYPECODE,) * 6)
+
+    __columns: tuple[Column, ...]
+    __start: Final[int]
+    __stop: int
+    __version: int
+    __is_frozen: bool
+    # Shared by a series and all of its views, see `derive_from_storage`.
+    __derived: dict[Hashable, tuple[int, Any]]
+
+    def __init__(
+            self,
+            the_time: Column,
+            high: Column,
+            low: Column,
+            open_amount: Column,
+            close_amount: Column,
+            volume_from: Column,
+            volume_to: Column,
+    ) -> None:
+        columns = (the_time, high, low, open_amount, close_amount, volume_from, volume_to)
+
+        for name, expected_typecode, column in zip(self.COLUMN_NAMES, self.COLUMN_TYPECODES, columns):
+            if memoryview(column).format != expected_typecode:
+                raise TypeError(f"Column {name} must be a buffer of typecode '{expected_typecode}'")
+
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError('all the columns must have the same length.')
+
+        self.__columns = columns
+        self.__start = 0
+        self.__stop = len(the_time)
+        self.__version = 0
+        self.__is_frozen = False
+        self.__derived = {}
+
+    @classmethod
+    def __view_of(
+            cls,
+            columns: tuple[Column, ...],
+            start: int,
+            stop: int,
+            derived: dict[Hashable, tuple[int, Any]],
+    ) -> 'CryptoSeries':
+        # Bypass `__init__`, as the columns have already been checked by the series they come from.
+        view = cls.__new__(cls)
+        view.__columns = columns
+        view.__start = start
+        view.__stop = stop
+        view.__version = 0
+        # A view always covers the same records, so it can never be extended.
+        view.__is_frozen = True
+        view.__derived = derived
+        return view
+
+    @classmethod
+    def empty(cls) -> 'CryptoSeries':
+        return cls(*(array(typecode) for typecode in cls.COLUMN_TYPECODES))
+
+    @classmethod
+    def from_records(cls, records: Iterable[CryptoRecord]) -> 'CryptoSeries':
+        """
+        Build a series from the given records. The records will be sorted by the time if they are not.
+        """
+        _records: Final[Sequence[CryptoRecord]] = records if isinstance(records, Sequence) else tuple(records)
+
+        # One pass for each column, rather than one `getattr` for each attribute of each record.
+        return cls(*(
+            array(typecode, map(attrgetter(name), _records))
+            for name, typecode in zip(cls.COLUMN_NAMES, cls.COLUMN_TYPECODES)
+        )).sorted_by_time()
+
+    @classmethod
+    def concatenate(cls, series: Iterable['CryptoSeries']) -> 'CryptoSeries':
+        """
+        Copy the given series one after another into a new series. The result is NOT sorted by the time.
+        """
+        columns = tuple(array(typecode) for typecode in cls.COLUMN_TYPECODES)
+
+        for each_series in series:
+            for column, source in zip(columns, each_series.columns()):
+                column.frombytes(source.cast('B'))
+
+        return cls(*columns)
+
+    @classmethod
+    def merge(
+            cls,
+            series: Iterable['CryptoSeries'],
+            duplicate_time_policy: DuplicateTimePolicy = DuplicateTimePolicy.KEEP,
+    ) -> 'CryptoSeries':
+        """
+        Merge several series into one series sorted by the time.
+
+        When the given series do not overlap (e.g. yearly exports), they are simply concatenated in order,
+        otherwise they are merged by a k-way heap merge, which costs O(n log k) instead of sorting all the records.
+        Records sharing the same time are ordered by the position of the series they come from.
+        """
+        # Empty series are dropped, the rest keep their original order in `given_series`.
+        given_series = tuple(each_series.sorted_by_time() for each_series in series if len(each_series) > 0)
+        ordered_series = sorted(given_series, key=lambda each_series: each_series.the_time[0])
+
+        if all(former.the_time[-1] < latter.the_time[0] for former, latter in pairwise(ordered_series)):
+            merged = cls.concatenate(ordered_series)
+        else:
+            merged = cls.__heap_merge(given_series)
+
+        return merged.with_duplicate_times(duplicate_time_policy)
+
+    @classmethod
+    def __heap_merge(cls, series: Sequence['CryptoSeries']) -> 'CryptoSeries':
+        columns = tuple(array(typecode) for typecode in cls.COLUMN_TYPECODES)
+        appenders = tuple(column.append for column in columns)
+        sources = tuple(each_series.columns() for each_series in series)
+
+        # The position of the series breaks the ties of the time.
+        for _, which, position in merge(
+                *(zip(each_series.the_time, repeat(which), range(len(each_series)))
+                  for which, each_series in enumerate(series))
+        ):
+            for append, source in zip(appenders, sources[which]):
+                append(source[position])
+
+        return cls(*columns)
+
+    @classmethod
+    def from_buffer(cls, buffer: Any, length: int, offset: int = 0) -> 'CryptoSeries':
+        """
+        Build a series on top of the packed columns in the given buffer, without copying them.
+        The layout is the one written by :meth:`columns`, i.e. every column one after another
+        in the order of :attr:`COLUMN_NAMES`, each of them has `length` items in native byte order.
+
+        Args:
+            buffer: any object supporting the buffer protocol, e.g. `bytes`, `mmap` or `SharedMemory.buf`
+            length: the number of records in the buffer
+            offset: the position of the first byte of the packed columns in the buffer
+        """
+        raw = memoryview(buffer).cast('B')
+        columns = []
+
+        for typecode in cls.COLUMN_TYPECODES:
+            end = offset + length * array(typecode).itemsize
+            if end > len(raw):
+                raise ValueError('the buffer is too small for the given length.')
+
+            columns.append(raw[offset:end].cast(typecode))
+            offset = end
+
+        return cls(*columns)
+
+    @classmethod
+    def packed_size(cls, length: int) -> int:
+        """
+        The number of bytes needed by :meth:`from_buffer` to hold `length` records.
+        """
+        return length * sum(array(typecode).itemsize for typecode in cls.COLUMN_TYPECODES)
+
+    def to_bytes(self) -> bytes:
+        """
+        Pack the columns one after another into bytes, which can be read back by :meth:`from_buffer`.
+        """
+        return b''.join(column.tobytes() for column in self.columns())
+
+    @classmethod
+    def packed_with_header_size(cls, length: int) -> int:
+        """
+        The number of bytes of :meth:`packed_with_header` for `length` records.
+        """
+        return PACKED_COLUMNS_OFFSET + cls.packed_size(length)
+
+    def packed_with_header(self, magic: bytes, version: int, metadata: bytes = b'') -> Iterator[bytes | memoryview]:
+        """
+        Pack the columns after a header, which can be read back by :meth:`from_packed_with_header`,
+        e.g. to be written into a file or a shared memory segment. The columns are not copied.
+
+        The header tells the owner of the layout (by `magic`), the version of the layout,
+        the byte order and the number of records, followed by the metadata of the owner.
+        The packed columns start at :data:`PACKED_COLUMNS_OFFSET`, so every item of them is aligned.
+
+        Args:
+            magic: identifies the owner of the layout, 8 bytes
+            version: the version of the layout, which should be bumped whenever the owner changes it
+            metadata: anything else the owner needs, at most :data:`PACKED_METADATA_SIZE` bytes
+
+        Returns:
+            the header, then each of the columns in the order of :attr:`COLUMN_NAMES`
+        """
+        if len(metadata) > PACKED_METADATA_SIZE:
+            raise ValueError(f"the metadata should be at most {PACKED_METADATA_SIZE} bytes.")
+
+        header = _PACKED_HEADER.pack(magic, version, _NATIVE_BYTE_ORDER, len(self))
+        yield header + metadata.ljust(PACKED_METADATA_SIZE, b'\0')
+        yield from self.columns()
+
+    def pack_with_header_into(self, buffer: Any, magic: bytes, version: int, metadata: bytes = b'') -> None:
+        """
+        Same as :meth:`packed_with_header`, but written into the given writable buffer,
+        which should be at least :meth:`packed_with_header_size` bytes.
+        """
+        raw = memoryview(buffer).cast('B')
+        offset = 0
+
+        for chunk in self.packed_with_header(magic, version, metadata):
+            chunk = memoryview(chunk).cast('B')
+            raw[offset:offset + chunk.nbytes] = chunk
+            offset += chunk.nbytes
+
+    @classmethod
+    def packed_header_of(cls, buffer: Any, magic: bytes, version: int) -> tuple[int, bytes]:
+        """
+        Read the header written by :meth:`packed_with_header`.
+
+        Returns:
+            the number of records, and the metadata padded to :data:`PACKED_METADATA_SIZE` bytes
+
+        Raises:
+            ValueError: if the buffer does not start with a header of the given magic and version in native byte order
+        """
+        raw = memoryview(buffer).cast('B')
+
+        if len(raw) < PACKED_COLUMNS_OFFSET:
+            raise ValueError('the buffer is too small for the header.')
+
+        given_magic, given_version, byte_order, length = _PACKED_HEADER.unpack_from(raw)
+        if (given_magic, given_version, byte_order) != (magic, version, _NATIVE_BYTE_ORDER):
+            raise ValueError('the buffer does not hold a compatible dataset.')
+
+        return length, raw[_PACKED_HEADER.size:PACKED_COLUMNS_OFFSET].tobytes()
+
+    @classmethod
+    def from_packed_with_header(cls, buffer: Any, magic: bytes, version: int) -> tuple['CryptoSeries', bytes]:
+        """
+        Build a series on top of the columns packed by :meth:`packed_with_header`, without copying them.
+
+        Returns:
+            the series, and the metadata padded to :data:`PACKED_METADATA_SIZE` bytes
+
+        Raises:
+            ValueError: if the header is not compatible, see :meth:`packed_header_of`, or the buffer is too small
+        """
+        length, metadata = cls.packed_header_of(buffer, magic, version)
+        return cls.from_buffer(buffer, length, offset=PACKED_COLUMNS_OFFSET), metadata
+
+    def columns(self) -> tuple[memoryview, ...]:
+        """
+        Read-only, zero-copy views of all the columns, in the order of :attr:`COLUMN_NAMES`.
+        """
+        return tuple(self.__column(i) for i in range(len(self.COLUMN_NAMES)))
+
+    def __column(self, index: int) -> memoryview:
+        return memoryview(self.__columns[index])[self.__start:self.__stop].toreadonly()
+
+    @property
+    def the_time(self) -> memoryview:
+        return self.__column(0)
+
+    @property
+    def high(self) -> memoryview:
+        return self.__column(1)
+
+    @property
+    def low(self) -> memoryview:
+        return self.__column(2)
+
+    @property
+    def open_amount(self) -> memoryview:
+        return self.__column(3)
+
+    @property
+    def close_amount(self) -> memoryview:
+        return self.__column(4)
+
+    @property
+    def volume_from(self) -> memoryview:
+        return self.__column(5)
+
+    @property
+    def volume_to(self) -> memoryview:
+        return self.__column(6)
+
+    def column(self, name: str) -> memoryview:
+        """
+        Get a read-only, zero-copy view of the column with the given name.
+
+        Raises:
+            KeyError: if there's no such column
+        """
+        try:
+            return self.__column(self.COLUMN_NAMES.index(name))
+        except ValueError as e:
+            raise KeyError(f"Error: no column named {name} in the series.") from e
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes occupied by the columns of this series (not the underlying buffers).
+        """
+        return sum(column.nbytes for column in self.columns())
+
+    @property
+    def version(self) -> int:
+        """
+        The number of times this series has been extended by :meth:`extend`.
+        Anything derived from the series should be invalidated when the version is changed.
+        """
+        return self.__version
+
+    @property
+    def is_frozen(self) -> bool:
+        """
+        Whether this series can no longer be extended, see :meth:`freeze`. A view of a series is always frozen.
+        """
+        return self.__is_frozen
+
+    def freeze(self) -> None:
+        """
+        Make this series immutable, so it can be safely shared. It can not be undone.
+        """
+        self.__is_frozen = True
+
+    def extend(self, other: 'CryptoSeries') -> None:
+        """
+        Append the records of the other series to the end of this series in place, in O(len(other)).
+
+        A frozen series or a view (slice) of a series can not be extended. The views taken before are not affected.
+        A series backed by read-only buffers (e.g. the memory-mapped cache) is copied into arrays on the first call.
+
+        Raises:
+            ValueError: if this series is frozen, or the appended records are not sorted by the time
+                or earlier than the last record of this series
+            BufferError: if a column of this series is still exported, e.g. someone holds a memoryview of it.
+                This series is left unchanged then, so it can be extended again after the memoryview is released.
+        """
+        if self.__is_frozen:
+            raise ValueError('a frozen series, or a view of a series, can not be extended.')
+
+        if len(other) == 0:
+            return
+
+        if not other.is_sorted_by_time() or (len(self) > 0 and other.the_time[0] < self.the_time[-1]):
+            raise ValueError('the appended records must be sorted by the time, and not earlier than the existing ones.')
+
+        if not all(isinstance(column, array) for column in self.__columns):
+            copied_columns = tuple(array(typecode) for typecode in self.COLUMN_TYPECODES)
+            for column, source in zip(copied_columns, self.columns()):
+                column.frombytes(source.cast('B'))
+            self.__columns = copied_columns
+
+        # All or nothing: when a column can not be resized, the columns extended before are restored.
+        length = len(self.__columns[0])
+        extended_columns: list[array] = []
+
+        try:
+            for column, source in zip(self.__columns, other.columns()):
+                column.frombytes(source.cast('B'))
+                extended_columns.append(column)
+        except BufferError:
+            for column in extended_columns:
+                del column[length:]
+            raise
+
+        self.__stop = len(self.__columns[0])
+        self.__version += 1
+
+    @property
+    def storage_offset(self) -> int:
+        """
+        The position of the first record of this series in the storage shared with the other views,
+        i.e. the series passed to the `derive` function of :meth:`derive_from_storage`.
+        """
+        return self.__start
+
+    def derive_from_storage(
+            self,
+            key: Hashable,
+            derive: Callable[['CryptoSeries'], _T],
+            extend: Callable[['CryptoSeries', _T, int], _T] | None = None,
+    ) -> _T:
+        """
+        Get something derived from all the records in the storage shared by this series and its views,
+        e.g. an index or a derived column. It is computed lazily by `derive` at the first time,
+        then cached and shared by this series and all of its views,
+        so a query on any view can reuse it by the positions offset by :attr:`storage_offset`.
+
+        The cached value is brought up to date when the storage has been extended, by `extend` if it's given,
+        otherwise it's derived again from scratch.
+        As the storage is append-only, what derived from the old records are never changed.
+
+        Args:
+            key: identifies what is derived
+            derive: computes the value from a series of all the records in the storage
+            extend: computes the value from a series of all the records in the storage, the value derived before,
+                and the number of the records it was derived from, so only the appended records are processed
+
+        Returns:
+            the derived value
+        """
+        storage_length = len(self.__columns[0])
+        cached = self.__derived.get(key)
+
+        if cached is not None and cached[0] == storage_length:
+            return cached[1]
+
+        storage = self.__view_of(self.__columns, 0, storage_length, self.__derived)
+
+        if cached is not None and extend is not None:
+            value = extend(storage, cached[1], cached[0])
+        else:
+            value = derive(storage)
+
+        self.__derived[key] = (storage_length, value)
+
+        return value
+
+    def record_at(self, index: int) -> CryptoRecord:
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('series index out of range')
+
+        position = self.__start + index
+        return CryptoRecord(*(column[position] for column in self.__columns))
+
+    def to_records(self) -> tuple[CryptoRecord, ...]:
+        return tuple(self)
+
+    def is_sorted_by_time(self) -> bool:
+        return all(former <= latter for former, latter in pairwise(self.the_time))
+
+    def sorted_by_time(self) -> 'CryptoSeries':
+        """
+        Returns this series if it is already sorted by the time, otherwise a sorted copy of it.
+        The sort is stable, so records with the same time keep their original order.
+        """
+        if self.is_sorted_by_time():
+            return self
+
+        order = sorted(range(len(self)), key=self.the_time.__getitem__)
+        return self.__take(order)
+
+    def with_duplicate_times(self, policy: DuplicateTimePolicy) -> 'CryptoSeries':
+        """
+        Apply the policy to the records sharing the same time. The series should be sorted by the time.
+
+        Returns:
+            this series if nothing is dropped, otherwise a copy without the dropped records
+
+        Raises:
+            DuplicateTimeError: if the policy is :attr:`DuplicateTimePolicy.ERROR` and there are duplicated times
+        """
+        positions = positions_of_unique_times(self.the_time, policy)
+        return self if positions is None else self.__take(positions)
+
+    def __take(self, indexes: Iterable[int]) -> 'CryptoSeries':
+        indexes = tuple(indexes)
+        return CryptoSeries(*(array(view.format, [view[i] for i in indexes]) for view in self.columns()))
+
+    def index_range(self, start_utc: int, end_utc: int) -> tuple[int, int]:
+        """
+        Find the positions of the records whose time is within the given (inclusive) range,
+        by binary searching the time column in O(log n).
+
+        Returns:
+            a pair (lo, hi) so that `self[lo:hi]` are exactly the records within the range
+        """
+        times = self.the_time
+
+        lo = bisect_left(times, start_utc)
+        hi = bisect_right(times, end_utc, lo=lo)
+
+        return lo, hi
+
+    def between(self, start_utc: int, end_utc: int) -> 'CryptoSeries':
+        """
+        Returns a zero-copy view of the records whose time is within the given (inclusive) range.
+        """
+        lo, hi = self.index_range(start_utc, end_utc)
+        return self[lo:hi]
+
+    def __len__(self) -> int:
+        return self.__stop - self.__start
+
+    @overload
+    def __getitem__(self, index: int) -> CryptoRecord:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'CryptoSeries':
+        ...
+
+    def __getitem__(self, index: int | slice) -> 'CryptoRecord | CryptoSeries':
+        if not isinstance(index, slice):
+            return self.record_at(index)
+
+        start, stop, step = index.indices(len(self))
+
+        if step != 1:
+            return self.__take(range(start, stop, step))
+
+        stop = max(start, stop)
+        return self.__view_of(self.__columns, self.__start + start, self.__start + stop, self.__derived)
+
+    def __iter__(self) -> Iterator[CryptoRecord]:
+        return map(CryptoRecord, *self.columns())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(length={len(self)})"
+
+
+def positions_of_unique_times(times: Sequence[int], policy: DuplicateTimePolicy) -> list[int] | None:
+    """
+    Find the positions to keep after applying the policy to the duplicated times, in one pass.
+
+    Args:
+        times: the times sorted in ascending order
+        policy: how to handle the duplicated times
+
+    Returns:
+        the positions to keep, or `None` when every position should be kept
+
+    Raises:
+        DuplicateTimeError: if the policy is :attr:`DuplicateTimePolicy.ERROR` and there are duplicated times
+    """
+    policy = DuplicateTimePolicy(policy)
+
+    if policy is DuplicateTimePolicy.KEEP:
+        return None
+
+    duplicated_positions = [position for position in range(1, len(times)) if times[position - 1] == times[position]]
+
+    if len(duplicated_positions) == 0:
+        return None
+
+    if policy is DuplicateTimePolicy.ERROR:
+        raise DuplicateTimeError(f": {times[duplicated_positions[0]]}")
+
+    # With `FIRST`, drop the later one of each duplicated pair, otherwise drop the former one.
+    offset = 0 if policy is DuplicateTimePolicy.FIRST else 1
+    dropped_positions = frozenset(position - offset for position in duplicated_positions)
+
+    return [position for position in range(len(times)) if position not in dropped_positions]
+
+
+@dataclass(frozen=True)
+class ValidatedCryptoSeries:
+    """
+    A dataset which has been checked once by :func:`validate_crypto_series`.
+    It is not empty, sorted by the time, and never changed, so its bounds are known.
+    It can be passed wherever the dataset is expected, and the checks are not repeated.
+
+    Attributes:
+        series: the checked dataset, a frozen view of the records
+        earliest_time: the time of the first record
+        latest_time: the time of the last record
+    """
+
+    series: CryptoSeries
+    earliest_time: int
+    latest_time: int
+
+
+def validate_crypto_series(series: CryptoSeries) -> ValidatedCryptoSeries:
+    """
+    Check the dataset once, and sort it by the time if it's not sorted yet.
+
+    Args:
+        series: the dataset
+
+    Returns:
+        the dataset with its bounds, whose records are never changed even if the given series is extended later
+
+    Raises:
+        ValueError: if the dataset is empty
+    """
+    if len(series) == 0:
+        raise ValueError('the dataset must not be empty.')
+
+    # A view of the whole series is frozen, while it shares the records and the indexes with the series.
+    sorted_series = series.sorted_by_time()[:]
+    times = sorted_series.the_time
+
+    return ValidatedCryptoSeries(sorted_series, times[0], times[-1])
+
+
+def __converted_tuple_of(records: tuple[CryptoRecord, ...]) -> CryptoSeries:
+    # A tuple of records never changes, so it's converted only once however many times it's queried.
+    with _converted_tuples_lock:
+        if (entry := _converted_tuples.get(id(records))) is not None and entry[0] is records:
+            _converted_tuples.move_to_end(id(records))
+            return entry[1]
+
+    series = CryptoSeries.from_records(records)
+    # Shared by the following calls with the same tuple, so it must not be extended.
+    series.freeze()
+
+    with _converted_tuples_lock:
+        _converted_tuples[id(records)] = records, series
+        _converted_tuples.move_to_end(id(records))
+
+        while len(_converted_tuples) > CONVERTED_TUPLE_CACHE_SIZE:
+            _converted_tuples.popitem(last=False)
+
+    return series
+
+
+def as_crypto_series(data: Any) -> CryptoSeries | None:
+    """
+    Interpret the given data as a :class:`CryptoSeries` if possible.
+    The series converted from a tuple of records is cached, so querying the same tuple again costs nothing more.
+
+    Args:
+        data: a :class:`CryptoSeries`, a :class:`ValidatedCryptoSeries`,
+            or a sequence (e.g. a tuple or a list) of :class:`CryptoRecord`
+
+    Returns:
+        the data as a series, or `None` when the data is not recognizable
+    """
+    if isinstance(data, CryptoSeries):
+        return data
+
+    if isinstance(data, ValidatedCryptoSeries):
+        return data.series
+
+    if (
+            isinstance(data, Sequence)
+            and not isinstance(data, (str, bytes, bytearray))
+            and (len(data) == 0 or isinstance(data[0], CryptoRecord))
+    ):
+        return __converted_tuple_of(data) if isinstance(data, tuple) else CryptoSeries.from_records(data)
+
+    return None
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import struct
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Final
+
+from series import CryptoSeries
+
+__all__ = ["SharedCryptoSeries", "publish_crypto_series", "attach_crypto_series", "detach_crypto_series"]
+
+# Bump this whenever the layout of the shared memory is changed.
+_SHARED_FORMAT_VERSION: Final[int] = 3
+_SHARED_MAGIC: Final[bytes] = b'BTCSHMEM'
+
+# The metadata in the header of the packed columns: pid of the publisher.
+_METADATA: Final[struct.Struct] = struct.Struct('<q')
+
+# The attached segments must outlive the series built on them, so they are kept until detached explicitly.
+_attached_segments: Final[dict[str, SharedMemory]] = {}
+
+
+class SharedCryptoSeries:
+    """
+    A dataset published into a named shared memory segment as packed columns,
+    so other processes can attach to it by :func:`attach_crypto_series` instead of reading the dataset again.
+
+    The publishing process owns the segment, it should call :meth:`unlink` (or use this object as
+    a context manager) when the workers are done, otherwise the segment outlives the process.
+    """
+
+    __shared_memory: Final[SharedMemory]
+
+    def __init__(self, shared_memory: SharedMemory) -> None:
+        self.__shared_memory = shared_memory
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the segment, which is passed to the other processes to attach to it.
+        """
+        return self.__shared_memory.name
+
+    @property
+    def series(self) -> CryptoSeries:
+        """
+        A read-only series on top of the segment, without copying it.
+        """
+        return _series_of(self.__shared_memory)
+
+    def unlink(self) -> None:
+        """
+        Destroy the segment. The processes attached to it can keep using it until they detach.
+        All the series built on this object should be released before calling this.
+        """
+        self.__shared_memory.unlink()
+        self.__shared_memory.close()
+
+    def __enter__(self) -> 'SharedCryptoSeries':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.unlink()
+
+
+def _series_of(shared_memory: SharedMemory) -> CryptoSeries:
+    try:
+        series, _ = CryptoSeries.from_packed_with_header(
+            shared_memory.buf.toreadonly(),
+            _SHARED_MAGIC,
+            _SHARED_FORMAT_VERSION
+        )
+    except ValueError as e:
+        raise ValueError(f"shared memory {shared_memory.name} does not hold a compatible dataset.") from e
+
+    series.freeze()
+
+    return series
+
+
+def publish_crypto_series(series: CryptoSeries, name: str | None = None) -> SharedCryptoSeries:
+    """
+    Copy the dataset into a new shared memory segment.
+
+    Args:
+        series: the dataset
+        name: the name of the segment, a unique name is generated when it is not given
+
+    Returns:
+        the handle of the segment, whose :attr:`SharedCryptoSeries.name` is used to attach to it
+
+    Raises:
+        FileExistsError: if a segment with the given name already exists
+    """
+    shared_memory = SharedMemory(name=name, create=True, size=CryptoSeries.packed_with_header_size(len(series)))
+    series.pack_with_header_into(shared_memory.buf, _SHARED_MAGIC, _SHARED_FORMAT_VERSION, _METADATA.pack(os.getpid()))
+
+    return SharedCryptoSeries(shared_memory)
+
+
+def attach_crypto_series(name: str) -> CryptoSeries:
+    """
+    Attach to a dataset published by :func:`publish_crypto_series`, possibly in another process.
+    Nothing is copied, and the returned series is read-only and frozen.
+
+    Args:
+        name: the name of the segment
+
+    Returns:
+        the dataset
+
+    Raises:
+        FileNotFoundError: if there's no segment with the given name
+    """
+    if (shared_memory := _attached_segments.get(name)) is None:
+        shared_memory = SharedMemory(name=name)
+
+        # Only the publisher owns the segment. Without this, the resource tracker of an unrelated process
+        # would destroy the segment when that process exits, even though other processes still use it.
+        if not _shares_resource_tracker_with(_publisher_pid_of(shared_memory)):
+            # noinspection PyProtectedMember
+            resource_tracker.unregister(shared_memory._name, 'shared_memory')
+
+        _attached_segments[name] = shared_memory
+
+    return _series_of(shared_memory)
+
+
+def _publisher_pid_of(shared_memory: SharedMemory) -> int | None:
+    try:
+        _, metadata = CryptoSeries.packed_header_of(shared_memory.buf, _SHARED_MAGIC, _SHARED_FORMAT_VERSION)
+    except ValueError:
+        return None
+
+    publisher_pid, = _METADATA.unpack_from(metadata)
+    return publisher_pid
+
+
+def _shares_resource_tracker_with(publisher_pid: int | None) -> bool:
+    # The segment is registered to the resource tracker of the publisher, which is also used by the publisher
+    # itself and its child processes started by `multiprocessing` (e.g. the workers of a process pool).
+    if publisher_pid is None:
+        return False
+
+    if publisher_pid == os.getpid():
+        return True
+
+    parent_process = multiprocessing.parent_process()
+    return parent_process is not None and parent_process.pid == publisher_pid
+
+
+def detach_crypto_series(name: str) -> None:
+    """
+    Detach from a dataset attached by :func:`attach_crypto_series`.
+    All the series attached to it should be released before calling this.
+    """
+    if (shared_memory := _attached_segments.pop(name, None)) is not None:
+        shared_memory.close()
@@ -3,21 +3,21 @@ from typing import Final
 from unittest import TestCase, TestSuite, TextTestRunner
 
 from err import StartDateAfterEndDateError
-from model import CryptoRecord
+from series import CryptoSeries
 from utils.colors import ConsoleColorWrapper, ConsoleColors, wrap_with_color
 from utils.timing import date_str_to_utc_number
 
 __all__ = ('Tester', None)
 
-_TEST_FUNC_TYPE = Callable[[TestCase, tuple[CryptoRecord]], None]
+_TEST_FUNC_TYPE = Callable[[TestCase, CryptoSeries], None]
 
 
 class Tester:
     __score_name: Final[str]
-    __original_data: Final[tuple[CryptoRecord]]
+    __original_data: Final[CryptoSeries]
     __test_funcs: Final[tuple[_TEST_FUNC_TYPE, ...]]
 
-    def __init__(self, scope_name: str, original_data: tuple[CryptoRecord], *test_funcs: _TEST_FUNC_TYPE):
+    def __init__(self, scope_name: str, original_data: CryptoSeries, *test_funcs: _TEST_FUNC_TYPE):
         self.__score_name = scope_name
         self.__original_data = original_data
         self.__test_funcs = test_funcs
@@ -35,12 +35,12 @@ class Tester:
 
 
 class _UnitTester(TestCase):
-    __original_data: Final[tuple[CryptoRecord]]
+    __original_data: Final[CryptoSeries]
     __test_func: Final[_TEST_FUNC_TYPE]
 
     def __init__(
             self,
-            original_data: tuple[CryptoRecord],
+            original_data: CryptoSeries,
             test_func: _TEST_FUNC_TYPE
     ):
         super().__init__()
@@ -1,5 +1,6 @@
 import __main__
 import os
+import sys
 from typing import Final
 
 __all__ = ["runtime_path_resolver"]
@@ -22,7 +23,7 @@ class __Path:
     RUNTIME_DIR: Final[str]
 
     def __init__(self):
-        current_dir: Final[str] = os.path.dirname(os.path.abspath(__main__.__file__))
+        current_dir: Final[str] = os.path.dirname(os.path.abspath(self.__main_file_path()))
 
         # This is needed to run the script from the root directory
         os.chdir(f"{current_dir}/")
@@ -33,12 +34,22 @@ class __Path:
         # Add the current directory to the PYTHONPATH
         self.__manually_add_python_path()
 
+    @staticmethod
+    def __main_file_path() -> str:
+        """Get the path of the main entrypoint.
+
+        A worker process started by the `spawn` or `forkserver` method runs the main entrypoint again
+        as `__mp_main__`, while its `__main__` is still the bootstrap of multiprocessing, which has no file.
+        """
+        if hasattr(__main__, '__file__'):
+            return __main__.__file__
+        return sys.modules['__mp_main__'].__file__
+
     def __manually_add_python_path(self):
         """Add the current directory to the PYTHONPATH.
 
         This is needed to run the script from the root directory.
         """
-        import sys
         sys.path.append(self.RUNTIME_DIR)
 
 
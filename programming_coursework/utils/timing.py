@@ -1,6 +1,68 @@
-from datetime import datetime, timezone
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Final
 
+__all__ = [
+    "SECONDS_PER_DAY",
+    "date_str_to_utc_number",
+    "date_strs_to_utc_numbers",
+    "utc_number_to_date_str",
+    "utc_numbers_to_date_strs",
+]
 
+SECONDS_PER_DAY: Final[int] = 86400
+
+# The number of distinct dates (or epochs) whose conversions are cached.
+DATE_CACHE_SIZE: Final[int] = 1 << 14
+
+# The same patterns as `datetime.strptime` uses for "%d/%m/%Y", so exactly the same strings are accepted.
+_DATE_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r'(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])/(1[0-2]|0[1-9]|[1-9])/(\d\d\d\d)',
+    re.IGNORECASE
+)
+
+# The range of years supported by `datetime`.
+_MIN_YEAR: Final[int] = 1
+_MAX_YEAR: Final[int] = 9999
+
+_DAYS_IN_MONTH: Final[tuple[int, ...]] = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_leap_year(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """
+    The number of days since 01/01/1970 of a date in the proleptic Gregorian calendar.
+    The years are counted from March, so the leap day is always the last day of a year.
+    """
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _civil_from_days(days: int) -> tuple[int, int, int]:
+    """
+    The (year, month, day) of the date which is the given number of days since 01/01/1970,
+    the inverse of :func:`_days_from_civil`.
+    """
+    days += 719468
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = shifted_month + (3 if shifted_month < 10 else -9)
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def date_str_to_utc_number(date_str: str) -> int:
     """
     Convert a date string to utc number.
@@ -8,15 +70,20 @@ def date_str_to_utc_number(date_str: str) -> int:
     :return: utc number
     """
 
-    try:
-        date_obj = datetime.strptime(date_str, "%d/%m/%Y")
-    except ValueError as e:
-        # FIXME: this is not a good practice. We should put the error message in the exception.
-        raise ValueError('invalid date value') from e
+    if (matched := _DATE_PATTERN.fullmatch(date_str)) is None:
+        raise ValueError('invalid date value')
+
+    day, month, year = int(matched[1]), int(matched[2]), int(matched[3])
+
+    days_in_month = 29 if month == 2 and _is_leap_year(year) else _DAYS_IN_MONTH[month - 1]
 
-    return int(date_obj.replace(tzinfo=timezone.utc).timestamp())
+    if not _MIN_YEAR <= year <= _MAX_YEAR or day > days_in_month:
+        raise ValueError('invalid date value')
 
+    return _days_from_civil(year, month, day) * SECONDS_PER_DAY
 
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def utc_number_to_date_str(utc_number: int) -> str:
     """
     Convert a utc number to date string.
@@ -24,4 +91,42 @@ def utc_number_to_date_str(utc_number: int) -> str:
     :return: string in "dd/mm/yyyy" format
     """
 
-    return datetime.fromtimestamp(utc_number, tz=timezone.utc).strftime("%d/%m/%Y")
+    year, month, day = _civil_from_days(int(utc_number // SECONDS_PER_DAY))
+
+    if not _MIN_YEAR <= year <= _MAX_YEAR:
+        raise ValueError(f"year {year} is out of range")
+
+    # The year is not padded, which is the same as `strftime`.
+    return f"{day:02d}/{month:02d}/{year}"
+
+
+def date_strs_to_utc_numbers(date_strs: Iterable[str]) -> list[int]:
+    """
+    Convert many date strings to utc numbers at once, see :func:`date_str_to_utc_number`.
+    :param date_strs: strings in "dd/mm/yyyy" format
+    :return: utc numbers in the same order
+    """
+
+    return list(map(date_str_to_utc_number, date_strs))
+
+
+def utc_numbers_to_date_strs(utc_numbers: Iterable[int]) -> list[str]:
+    """
+    Convert many utc numbers to date strings at once, see :func:`utc_number_to_date_str`.
+    The consecutive utc numbers of the same day share one conversion.
+    :param utc_numbers: utc numbers
+    :return: strings in "dd/mm/yyyy" format in the same order
+    """
+
+    date_strs_of_days: dict[int, str] = {}
+    date_strs: list[str] = []
+
+    for utc_number in utc_numbers:
+        days = int(utc_number // SECONDS_PER_DAY)
+
+        if (date_str := date_strs_of_days.get(days)) is None:
+            date_str = date_strs_of_days[days] = utc_number_to_date_str(days * SECONDS_PER_DAY)
+
+        date_strs.append(date_str)
+
+    return date_strs
@@ -1,11 +1,109 @@
+from collections.abc import Collection, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, fields
+from itertools import count, repeat
+from typing import Final
 
-__all__ = ["ValidatableDataClass"]
+from enums import ValidationMode
+
+__all__ = ["ValidatableDataClass", "using_validation_mode"]
+
+# When sampling, one out of every this many instances is validated.
+DEFAULT_SAMPLE_INTERVAL: Final[int] = 100
+
+_validation_mode: Final[ContextVar[ValidationMode]] = ContextVar('validation_mode', default=ValidationMode.FULL)
+_sample_interval: Final[ContextVar[int]] = ContextVar('sample_interval', default=DEFAULT_SAMPLE_INTERVAL)
+_sample_counter: Final[Iterator[int]] = count()
+
+# The formats (see the `struct` module) of the typed columns whose items are of the given type.
+_COLUMN_FORMATS_OF_TYPES: Final[dict[type, frozenset[str]]] = {
+    int: frozenset('bBhHiIlLqQnN'),
+    float: frozenset('efd'),
+}
+
+# `dataclasses.fields` is quite slow, so the (name, type) pairs of each class are cached.
+_cached_field_types: Final[dict[type, tuple[tuple[str, type], ...]]] = {}
+
+
+@contextmanager
+def using_validation_mode(mode: ValidationMode, sample_interval: int = DEFAULT_SAMPLE_INTERVAL) -> Iterator[None]:
+    """
+    Select how the instances of :class:`ValidatableDataClass` constructed within the context are validated.
+
+    :param mode: the validation mode, see :class:`ValidationMode`
+    :param sample_interval: one out of every `sample_interval` instances is validated, for the sampled mode
+    """
+    if sample_interval <= 0:
+        raise ValueError('sample_interval should greater than 0')
+
+    mode_token = _validation_mode.set(ValidationMode(mode))
+    interval_token = _sample_interval.set(sample_interval)
+    try:
+        yield
+    finally:
+        _sample_interval.reset(interval_token)
+        _validation_mode.reset(mode_token)
+
+
+def _field_types_of(cls: type) -> tuple[tuple[str, type], ...]:
+    if (field_types := _cached_field_types.get(cls)) is None:
+        field_types = _cached_field_types[cls] = tuple((field.name, field.type) for field in fields(cls))
+    return field_types
+
+
+def _should_validate_instance() -> bool:
+    mode = _validation_mode.get()
+
+    if mode is ValidationMode.FULL:
+        return True
+
+    if mode is ValidationMode.SAMPLED:
+        return next(_sample_counter) % _sample_interval.get() == 0
+
+    return False
 
 
 @dataclass(frozen=True)
 class ValidatableDataClass:
     def __post_init__(self):
-        for field in fields(self):
-            if not isinstance(getattr(self, field.name), field.type):
-                raise TypeError(f"Field {field.name} must be of type {field.type}")
+        if _should_validate_instance():
+            self.validate()
+
+    def validate(self) -> None:
+        """
+        Check the type of every field, regardless of the validation mode.
+
+        :raise TypeError: if any field is not of its annotated type
+        """
+        for name, field_type in _field_types_of(self.__class__):
+            if not isinstance(getattr(self, name), field_type):
+                raise TypeError(f"Field {name} must be of type {field_type}")
+
+    @classmethod
+    def validate_columns(cls, columns: Mapping[str, Collection]) -> None:
+        """
+        Check the values column by column, for the bulk validation mode.
+
+        Every item of a typed column (an `array` or a `memoryview`) is already of the type of its format,
+        so only the format of such a column is checked, instead of every value in it.
+        The values of any other column are checked one by one.
+
+        :param columns: the values of each field, keyed by the name of the field
+        :raise TypeError: if any value is not of the annotated type of its field
+        :raise ValueError: if the columns are not of the same length
+        """
+        for name, field_type in _field_types_of(cls):
+            column = columns[name]
+            column_format = getattr(column, 'format', getattr(column, 'typecode', None))
+
+            if column_format is not None:
+                is_valid = column_format in _COLUMN_FORMATS_OF_TYPES.get(field_type, ())
+            else:
+                is_valid = all(map(isinstance, column, repeat(field_type)))
+
+            if not is_valid:
+                raise TypeError(f"Field {name} must be of type {field_type}")
+
+        if len({len(columns[name]) for name, _ in _field_types_of(cls)}) > 1:
+            raise ValueError('all the columns should have the same length')